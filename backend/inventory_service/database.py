@@ -1,19 +1,30 @@
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
+from mongo import get_client
+from pymongo import ASCENDING, IndexModel
 
 load_dotenv()
 
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 DB_NAME = os.getenv("INVENTORY_DB_NAME", "smart_shopping_inventory")
 
-_client: AsyncIOMotorClient | None = None
-
-def get_client() -> AsyncIOMotorClient:
-    global _client
-    if _client is None:
-        _client = AsyncIOMotorClient(MONGO_URI)
-    return _client
+# Indexes this service relies on; ensured on startup and checked by `python indexes.py --check`.
+INDEXES = {
+    "items": [
+        IndexModel([("name", ASCENDING), ("_id", ASCENDING)], background=True),
+        # Unique so concurrent importer upserts can't create two items for one name.
+        IndexModel(
+            [("name_key", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"name_key": {"$exists": True}},
+            # Named apart from the old non-unique name_key_1, so it can be built before that is dropped.
+            name="name_key_unique",
+            background=True,
+        ),
+        IndexModel([("category", ASCENDING)], background=True),
+        IndexModel([("price_cents", ASCENDING), ("_id", ASCENDING)], background=True),
+        IndexModel([("size_unit", ASCENDING), ("size_qty", ASCENDING)], background=True),
+    ],
+}
 
 
 def get_database():
@@ -1,63 +1,240 @@
+import argparse
 import asyncio
 import csv
 import sys
+import time
+import uuid
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 from dotenv import load_dotenv
 from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 
 from database import get_items_collection
+from indexes import ensure_indexes
+from item_fields import derived_fields
+from search_index import normalize
 
 load_dotenv()
 
+DUPLICATE_KEY = 11000
+
 
 def normalize_name(name: str) -> str:
-  """Lowercase and strip for comparisons."""
-  return name.strip().lower()
+  """Key used to match CSV rows to catalog items; same normalization as the suggest index."""
+  return normalize(name)
 
 
-async def import_csv(csv_path: Path, collection: AsyncIOMotorCollection):
-  existing = {}
-  async for doc in collection.find({}, projection={"_id": 1, "name": 1}):
-    existing[normalize_name(doc["name"])] = doc["_id"]
+@dataclass
+class ImportStats:
+  rows: int = 0
+  skipped: int = 0
+  inserted: int = 0
+  updated: int = 0
+  unchanged: int = 0
+  errors: list[str] = field(default_factory=list)
 
-  to_insert = []
+
+def read_chunks(csv_path: Path, batch_size: int) -> Iterator[list[dict]]:
+  """Yield parsed rows in batches so the file is never fully in memory."""
   with csv_path.open(newline="", encoding="utf-8") as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-      name = row.get("name", "").strip()
-      if not name:
-        continue
-      key = normalize_name(name)
-      if key in existing:
-        continue
-      price = row.get("price")
-      size = row.get("size")
-      doc = {
-        "name": name,
-        "default_unit": size or None,
-        "price": price or None,
-        "size": size or None,
-      }
-      to_insert.append(doc)
-
-  if not to_insert:
-    print("No new items to insert.")
-    return
-
-  result = await collection.insert_many(to_insert)
-  print(f"Inserted {len(result.inserted_ids)} items.")
-
-
-async def main(path_str: Optional[str]):
-  csv_path = Path(path_str or "grocery_store.csv")
+    chunk: list[dict] = []
+    for row in csv.DictReader(f):
+      name = (row.get("name") or "").strip()
+      chunk.append({"key": normalize_name(name), "name": name, "price": row.get("price") or None, "size": row.get("size") or None})
+      if len(chunk) >= batch_size:
+        yield chunk
+        chunk = []
+    if chunk:
+      yield chunk
+
+
+def build_upserts(rows: list[dict]) -> list[UpdateOne]:
+  ops = []
+  for row in rows:
+    fields = {"name": row["name"], "price": row["price"], "size": row["size"]}
+    ops.append(
+      UpdateOne(
+        {"name_key": row["key"]},
+        {
+          "$set": {**fields, **derived_fields(fields)},
+          "$setOnInsert": {"_id": str(uuid.uuid4()), "default_unit": row["size"]},
+        },
+        upsert=True,
+      )
+    )
+  return ops
+
+
+async def backfill_derived_fields(collection: AsyncIOMotorCollection):
+  """Fill name_key/price_cents/size_* on items that predate them."""
+  ops = []
+  missing = {"$or": [{"name_key": {"$exists": False}}, {"price_cents": {"$exists": False}}, {"size_unit": {"$exists": False}}]}
+  async for doc in collection.find(missing, projection={"name": 1, "price": 1, "size": 1}):
+    raw = {"name": doc.get("name"), "price": doc.get("price"), "size": doc.get("size")}
+    ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": derived_fields(raw)}))
+    if len(ops) >= 1000:
+      await collection.bulk_write(ops, ordered=False)
+      ops = []
+  if ops:
+    await collection.bulk_write(ops, ordered=False)
+
+
+async def duplicate_names(collection: AsyncIOMotorCollection) -> list[dict]:
+  """Existing items sharing a name_key (e.g. "Eggs" and "eggs"), which block the unique index."""
+  pipeline = [
+    {"$match": {"name_key": {"$exists": True}}},
+    {"$group": {"_id": "$name_key", "items": {"$push": {"id": "$_id", "name": "$name"}}, "count": {"$sum": 1}}},
+    {"$match": {"count": {"$gt": 1}}},
+    {"$sort": {"_id": 1}},
+  ]
+  return [group async for group in collection.aggregate(pipeline)]
+
+
+def report_duplicates(groups: list[dict], stats: ImportStats):
+  for group in groups:
+    items = ", ".join(f"{item['name']!r} ({item['id']})" for item in group["items"])
+    stats.errors.append(f"duplicate name {group['_id']!r}: {items}")
+
+
+async def write_batch(
+  collection: AsyncIOMotorCollection, batch_no: int, rows: list[dict], stats: ImportStats, retry_duplicates: bool = True
+):
+  retry = []
+  try:
+    result = await collection.bulk_write(build_upserts(rows), ordered=False)
+    details = result.bulk_api_result
+  except BulkWriteError as exc:
+    details = exc.details
+    for err in details.get("writeErrors", []):
+      row = rows[err["index"]]
+      if err.get("code") == DUPLICATE_KEY and retry_duplicates:
+        # Another batch in flight upserted this name first; the item exists now, so this matches it.
+        retry.append(row)
+      else:
+        stats.errors.append(f"batch {batch_no}: {row['name']!r}: {err.get('errmsg')}")
+  stats.inserted += details.get("nUpserted", 0)
+  stats.updated += details.get("nModified", 0)
+  stats.unchanged += details.get("nMatched", 0) - details.get("nModified", 0)
+  if retry:
+    await write_batch(collection, batch_no, retry, stats, retry_duplicates=False)
+
+
+async def diff_batch(collection: AsyncIOMotorCollection, rows: list[dict], stats: ImportStats, planned: dict[str, dict]):
+  """planned holds rows already diffed by earlier batches, standing in for the writes a real run would make."""
+  existing = {}
+  keys = [row["key"] for row in rows]
+  async for doc in collection.find({"name_key": {"$in": keys}}, projection={"name_key": 1, "price": 1, "size": 1}):
+    existing[doc["name_key"]] = doc
+  for row in rows:
+    doc = planned.get(row["key"]) or existing.get(row["key"])
+    planned[row["key"]] = row
+    if doc is None:
+      stats.inserted += 1
+      print(f"+ {row['name']} ({row['price']}, {row['size']})")
+    elif (doc.get("price"), doc.get("size")) != (row["price"], row["size"]):
+      stats.updated += 1
+      print(f"~ {row['name']}: {doc.get('price')}, {doc.get('size')} -> {row['price']}, {row['size']}")
+    else:
+      stats.unchanged += 1
+
+
+async def import_csv(
+  csv_path: Path,
+  collection: AsyncIOMotorCollection,
+  batch_size: int = 1000,
+  concurrency: int = 4,
+  dry_run: bool = False,
+) -> ImportStats:
+  stats = ImportStats()
+  if dry_run:
+    legacy = await collection.count_documents({"name_key": {"$exists": False}})
+    if legacy:
+      print(f"Note: {legacy} existing items have no name_key yet and will show as new.")
+    duplicates = await duplicate_names(collection)
+    if duplicates:
+      print(f"Note: {len(duplicates)} names are shared by several items; a real import stops until they are resolved.")
+      report_duplicates(duplicates, stats)
+  else:
+    await backfill_derived_fields(collection)
+    # The unique name_key index can't be built over items that share a name (older versions
+    # allowed names differing only by case or spacing); list them for renaming or deletion
+    # rather than import without it.
+    duplicates = await duplicate_names(collection)
+    if duplicates:
+      print(f"{len(duplicates)} names are shared by several items; rename or delete the extras, then re-run.")
+      report_duplicates(duplicates, stats)
+      for err in stats.errors:
+        print(f"Error: {err}")
+      return stats
+    # Upserts look items up by name_key; make sure the service's indexes exist first.
+    await ensure_indexes()
+
+  # A batch waits for a free slot before it is dispatched, so at most `concurrency`
+  # batches (plus the one being read) are held in memory at any time.
+  slots = asyncio.Semaphore(concurrency)
+  pending: set[asyncio.Task] = set()
+  planned: dict[str, dict] = {}
+  start = time.perf_counter()
+
+  async def run(batch_no: int, rows: list[dict]):
+    try:
+      if dry_run:
+        await diff_batch(collection, rows, stats, planned)
+      else:
+        await write_batch(collection, batch_no, rows, stats)
+    finally:
+      slots.release()
+
+  for batch_no, chunk in enumerate(read_chunks(csv_path, batch_size), start=1):
+    # Drop blank names; last row wins for a name repeated in one batch, since
+    # duplicate keys inside a single unordered bulk_write would race.
+    rows = list({row["key"]: row for row in chunk if row["key"]}.values())
+    stats.rows += len(chunk)
+    stats.skipped += len(chunk) - len(rows)
+    if not rows:
+      continue
+    await slots.acquire()
+    task = asyncio.create_task(run(batch_no, rows))
+    pending.add(task)
+    task.add_done_callback(pending.discard)
+  if pending:
+    await asyncio.gather(*pending)
+
+  elapsed = time.perf_counter() - start
+  verb = "Would insert" if dry_run else "Inserted"
+  print(
+    f"{verb} {stats.inserted}, {'would update' if dry_run else 'updated'} {stats.updated}, "
+    f"unchanged {stats.unchanged}, skipped {stats.skipped} blank/duplicate of {stats.rows} rows "
+    f"in {elapsed:.2f}s ({stats.rows / elapsed if elapsed else 0:.0f} rows/s)."
+  )
+  for err in stats.errors:
+    print(f"Error: {err}")
+  return stats
+
+
+async def main(args: argparse.Namespace):
+  csv_path = Path(args.path or "grocery_store.csv")
   if not csv_path.exists():
     print(f"CSV file not found at {csv_path}")
     sys.exit(1)
   collection = get_items_collection()
-  await import_csv(csv_path, collection)
+  stats = await import_csv(csv_path, collection, args.batch_size, args.concurrency, args.dry_run)
+  if stats.errors:
+    sys.exit(1)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+  parser = argparse.ArgumentParser(description="Upsert catalog items from a grocery CSV (name,price,size).")
+  parser.add_argument("path", nargs="?", help="CSV file (default: grocery_store.csv)")
+  parser.add_argument("--batch-size", type=int, default=1000, help="rows per bulk_write")
+  parser.add_argument("--concurrency", type=int, default=4, help="bulk_writes in flight at once")
+  parser.add_argument("--dry-run", action="store_true", help="print the diff against the catalog without writing")
+  return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-  asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else None))
+  asyncio.run(main(parse_args()))
@@ -0,0 +1,71 @@
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+
+from search_index import normalize
+
+_SIZE = re.compile(r"^\s*(\d+/\d+|\d*\.?\d+)?\s*([a-z][a-z .]*?)?\s*$", re.IGNORECASE)
+_UNIT_ALIASES = {
+    "each": "ea",
+    "cnt": "ct",
+    "count": "ct",
+    "pkg": "pk",
+    "pack": "pk",
+    "roll": "rl",
+    "lt": "l",
+    "ltr": "l",
+    "liter": "l",
+    "gr": "g",
+    "gram": "g",
+    "ga": "gal",
+    "gallon": "gal",
+    "pint": "pt",
+    "doz": "dz",
+    "dozen": "dz",
+    "fo": "fl oz",
+    "lbs": "lb",
+}
+
+
+def parse_price_cents(price: Optional[str]) -> Optional[int]:
+    """"$1,299.99" -> 129999; None when the string is not a price."""
+    if not price:
+        return None
+    try:
+        amount = Decimal(price.strip().lstrip("$").replace(",", ""))
+    except InvalidOperation:
+        return None
+    if not amount.is_finite() or amount < 0:
+        return None
+    return int((amount * 100).to_integral_value())
+
+
+def parse_size(size: Optional[str]) -> tuple[Optional[float], Optional[str]]:
+    """"16 oz" -> (16.0, "oz"), "lb" -> (1.0, "lb"), "1/2 gal" -> (0.5, "gal")."""
+    match = _SIZE.match(size or "")
+    if not match or not any(match.groups()):
+        return None, None
+    qty_text, unit = match.groups()
+    if qty_text is None:
+        qty = 1.0
+    elif "/" in qty_text:
+        numerator, denominator = qty_text.split("/")
+        qty = int(numerator) / int(denominator) if int(denominator) else None
+    else:
+        qty = float(qty_text)
+    if unit:
+        unit = " ".join(unit.lower().replace(".", " ").split())
+        unit = _UNIT_ALIASES.get(unit, unit)
+    return qty, unit or None
+
+
+def derived_fields(data: dict) -> dict:
+    """Query fields computed from the raw strings present in data, for $set alongside them."""
+    fields = {}
+    if "name" in data:
+        fields["name_key"] = normalize(data["name"])
+    if "price" in data:
+        fields["price_cents"] = parse_price_cents(data["price"])
+    if "size" in data:
+        fields["size_qty"], fields["size_unit"] = parse_size(data["size"])
+    return fields
@@ -1,18 +1,47 @@
+import asyncio
+import base64
+import json
+import os
 import time
 import uuid
-from typing import List as ListType, Optional
+from collections import Counter
+from typing import List as ListType, Literal, Optional, Union
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 from database import get_categories_collection, get_items_collection
+from indexes import provision_indexes
+from mongo import close_client, pool_stats, warm_up
+from item_cache import TTLCache
 from metrics import send_metric
-from schemas import CategoryCreate, CategoryResponse, ItemCreate, ItemResponse, ItemUpdate
+from schemas import (
+    CategoryCreate,
+    CategoryResponse,
+    ItemBatchGetRequest,
+    ItemBatchGetResponse,
+    ItemBulkRequest,
+    ItemBulkResponse,
+    ItemBulkResult,
+    ItemCreate,
+    ItemPage,
+    ItemResponse,
+    ItemUpdate,
+)
+from item_fields import derived_fields
+from search_index import ItemSearchIndex
 
 load_dotenv()
 
 SERVICE_NAME = "inventory_service"
+# Periodic full rebuild picks up writes that bypass this process (e.g. the CSV importer); 0 disables.
+SEARCH_INDEX_REFRESH_SECONDS = int(os.getenv("SEARCH_INDEX_REFRESH_SECONDS", "300"))
+ITEM_CACHE_SIZE = int(os.getenv("ITEM_CACHE_SIZE", "5000"))
+ITEM_CACHE_TTL_SECONDS = float(os.getenv("ITEM_CACHE_TTL_SECONDS", "60"))
 app = FastAPI(title="Smart Shopping List - Inventory Service")
 
 app.add_middleware(
@@ -32,6 +61,59 @@ async def record_metrics(request: Request, call_next):
     return response
 
 
+@app.on_event("startup")
+async def start_index_provisioning():
+    # Runs in the background so a slow index build or unreachable Mongo doesn't block startup.
+    app.state.index_task = asyncio.create_task(provision_indexes(SERVICE_NAME))
+
+
+@app.on_event("startup")
+async def start_mongo_pool():
+    app.state.mongo_warm_up_task = asyncio.create_task(warm_up(SERVICE_NAME))
+
+
+@app.on_event("shutdown")
+async def close_mongo_pool():
+    close_client()
+
+
+search_index = ItemSearchIndex()
+item_cache = TTLCache(ITEM_CACHE_SIZE, ITEM_CACHE_TTL_SECONDS)
+
+
+async def rebuild_search_index():
+    collection = get_items_collection()
+    search_index.begin_load()
+    try:
+        docs = [doc async for doc in collection.find({})]
+    except Exception:
+        search_index.cancel_load()
+        raise
+    search_index.load(docs)
+
+
+async def refresh_search_index():
+    while True:
+        try:
+            await rebuild_search_index()
+        except Exception:
+            # Keep serving from the previous snapshot (or Mongo while cold).
+            pass
+        if SEARCH_INDEX_REFRESH_SECONDS <= 0:
+            return
+        await asyncio.sleep(SEARCH_INDEX_REFRESH_SECONDS)
+
+
+@app.on_event("startup")
+async def start_search_index():
+    app.state.search_index_task = asyncio.create_task(refresh_search_index())
+
+
+@app.on_event("shutdown")
+async def stop_search_index():
+    app.state.search_index_task.cancel()
+
+
 def serialize_item(doc) -> ItemResponse:
     return ItemResponse(
         id=str(doc.get("_id")),
@@ -42,6 +124,9 @@ def serialize_item(doc) -> ItemResponse:
         barcode=doc.get("barcode"),
         price=doc.get("price"),
         size=doc.get("size"),
+        price_cents=doc.get("price_cents"),
+        size_qty=doc.get("size_qty"),
+        size_unit=doc.get("size_unit"),
     )
 
 
@@ -54,23 +139,103 @@ async def health():
     return {"service": SERVICE_NAME, "status": "ok"}
 
 
-@app.get("/items", response_model=list[ItemResponse])
-async def list_items(category: Optional[str] = None, text: Optional[str] = Query(default=None)):
+@app.get("/health/pool")
+async def health_pool():
+    return {"service": SERVICE_NAME, **pool_stats.snapshot()}
+
+
+ITEM_FIELDS = set(ItemResponse.model_fields) - {"id"}
+EXPORT_FIELDS = sorted(ITEM_FIELDS)
+
+
+SORT_FIELDS = {"name": "name", "price": "price_cents"}
+
+
+def encode_cursor(doc, sort_field: str) -> str:
+    raw = json.dumps([sort_field, doc.get(sort_field), str(doc.get("_id"))]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str, sort_field: str) -> tuple:
+    """(value, _id) of the last item served; the cursor must come from a page with the same sort."""
+    try:
+        cursor_field, value, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if cursor_field != sort_field:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor does not match sort")
+    return value, item_id
+
+
+def parse_fields(fields: Optional[str]) -> ListType[str]:
+    if not fields:
+        return sorted(ITEM_FIELDS)
+    requested = [f.strip() for f in fields.split(",") if f.strip() and f.strip() != "id"]
+    unknown = set(requested) - ITEM_FIELDS
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+        )
+    return requested
+
+
+@app.get("/items", response_model=Union[list[ItemResponse], ItemPage])
+async def list_items(
+    category: Optional[str] = None,
+    text: Optional[str] = Query(default=None),
+    min_price: Optional[float] = Query(default=None, ge=0),
+    max_price: Optional[float] = Query(default=None, ge=0),
+    sort: Optional[Literal["name", "price"]] = None,
+    limit: Optional[int] = Query(default=None, ge=1, le=1000),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+):
     collection = get_items_collection()
     filters = {}
     if category:
         filters["category"] = category
     if text:
         filters["name"] = {"$regex": text, "$options": "i"}
-    cursor = collection.find(filters)
-    results: ListType[ItemResponse] = []
-    async for doc in cursor:
-        results.append(serialize_item(doc))
-    return results
+    if min_price is not None or max_price is not None or sort == "price":
+        # Items without a parseable price are left out of price-filtered/sorted views.
+        price_filter = {"$ne": None}
+        if min_price is not None:
+            price_filter["$gte"] = round(min_price * 100)
+        if max_price is not None:
+            price_filter["$lte"] = round(max_price * 100)
+        filters["price_cents"] = price_filter
+    sort_field = SORT_FIELDS[sort or "name"]
+    if limit is None:
+        if after or fields:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="after/fields require limit")
+        cursor = collection.find(filters)
+        if sort:
+            cursor = cursor.sort([(sort_field, 1), ("_id", 1)])
+        results: ListType[ItemResponse] = []
+        async for doc in cursor:
+            results.append(serialize_item(doc))
+        return results
+
+    # Paginated mode: keyset on (sort field, _id) so each page is an index range, not a skip.
+    selected = parse_fields(fields)
+    if after:
+        last_value, last_id = decode_cursor(after, sort_field)
+        keyset = {"$or": [{sort_field: {"$gt": last_value}}, {sort_field: last_value, "_id": {"$gt": last_id}}]}
+        filters = {"$and": [filters, keyset]} if filters else keyset
+    projection = {field: 1 for field in selected}
+    projection[sort_field] = 1
+    cursor = collection.find(filters, projection=projection, limit=limit).sort([(sort_field, 1), ("_id", 1)])
+    docs = await cursor.to_list(length=limit)
+    items = [{"id": str(doc.get("_id")), **{field: doc.get(field) for field in selected}} for doc in docs]
+    next_cursor = encode_cursor(docs[-1], sort_field) if len(docs) == limit else None
+    return ItemPage(items=items, next_cursor=next_cursor)
 
 
 @app.get("/items/suggest", response_model=list[ItemResponse])
 async def suggest_items(text: str = Query(min_length=1), limit: int = Query(default=20, ge=1, le=100)):
+    if search_index.ready:
+        return [serialize_item(doc) for doc in search_index.search(text, limit)]
     collection = get_items_collection()
     cursor = (
         collection.find({"name": {"$regex": text, "$options": "i"}}, limit=limit)
@@ -82,23 +247,175 @@ async def suggest_items(text: str = Query(min_length=1), limit: int = Query(defa
     return results
 
 
+async def stream_items_ndjson(cursor, batch_size: int):
+    # One chunk per driver batch keeps memory bounded by batch_size, not catalog size.
+    lines: ListType[str] = []
+    async for doc in cursor:
+        row = {"id": str(doc.get("_id")), **{field: doc.get(field) for field in EXPORT_FIELDS}}
+        lines.append(json.dumps(row))
+        if len(lines) >= batch_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+@app.get("/items/export")
+async def export_items(category: Optional[str] = None, batch_size: int = Query(default=500, ge=1, le=5000)):
+    collection = get_items_collection()
+    filters = {"category": category} if category else {}
+    cursor = collection.find(filters, projection=EXPORT_FIELDS, batch_size=batch_size)
+    return StreamingResponse(stream_items_ndjson(cursor, batch_size), media_type="application/x-ndjson")
+
+
+DUPLICATE_KEY = 11000
+
+
+def duplicate_name() -> HTTPException:
+    # name_key is unique: names may not differ only by case or spacing.
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail="An item with this name already exists")
+
+
 @app.post("/items", response_model=ItemResponse, status_code=status.HTTP_201_CREATED)
 async def create_item(payload: ItemCreate):
     collection = get_items_collection()
     item_id = str(uuid.uuid4())
-    doc = {"_id": item_id, **payload.model_dump()}
-    await collection.insert_one(doc)
+    data = payload.model_dump()
+    doc = {"_id": item_id, **data, **derived_fields(data)}
+    try:
+        await collection.insert_one(doc)
+    except DuplicateKeyError:
+        raise duplicate_name()
+    item_cache.invalidate(item_id)
+    search_index.add(doc)
     return serialize_item(doc)
 
 
 async def get_item_or_404(item_id: str):
+    cached = item_cache.get(item_id)
+    if cached is not None:
+        # Hand out a copy; callers such as update_item mutate the doc in place.
+        return dict(cached)
     collection = get_items_collection()
     doc = await collection.find_one({"_id": item_id})
     if not doc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+    item_cache.set(item_id, dict(doc))
     return doc
 
 
+@app.get("/items/cache/stats")
+async def item_cache_stats():
+    return item_cache.stats()
+
+
+@app.post("/items/batch-get", response_model=ItemBatchGetResponse)
+async def batch_get_items(payload: ItemBatchGetRequest):
+    found = {}
+    uncached = []
+    for item_id in dict.fromkeys(payload.ids):
+        cached = item_cache.get(item_id)
+        if cached is not None:
+            found[item_id] = cached
+        else:
+            uncached.append(item_id)
+    if uncached:
+        collection = get_items_collection()
+        async for doc in collection.find({"_id": {"$in": uncached}}):
+            found[doc["_id"]] = doc
+            item_cache.set(doc["_id"], dict(doc))
+    items = [serialize_item(found[item_id]) if item_id in found else None for item_id in payload.ids]
+    missing = [item_id for item_id in dict.fromkeys(payload.ids) if item_id not in found]
+    return ItemBatchGetResponse(items=items, missing=missing)
+
+
+@app.post("/items/bulk", response_model=ItemBulkResponse)
+async def bulk_items(payload: ItemBulkRequest):
+    collection = get_items_collection()
+    # The writes run as one unordered bulk_write, so an id that is deleted can't also be
+    # updated or deleted again: which of those ran first would not be well defined.
+    deletes = Counter(op.id for op in payload.operations if op.op == "delete")
+    updates = {op.id for op in payload.operations if op.op == "update"}
+    conflicts = sorted({item_id for item_id, count in deletes.items() if count > 1} | (updates & deletes.keys()))
+    if conflicts:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Items deleted more than once or both updated and deleted: {', '.join(conflicts)}",
+        )
+
+    # One read resolves every update/delete target so misses are reported per operation
+    # and the search index can be patched with full documents after the write.
+    target_ids = list(updates | deletes.keys())
+    existing = {}
+    if target_ids:
+        async for doc in collection.find({"_id": {"$in": target_ids}}):
+            existing[doc["_id"]] = doc
+
+    results: ListType[ItemBulkResult] = []
+    writes = []
+    write_results: ListType[ItemBulkResult] = []
+    # Per write: the fields it sets (the whole doc for a create), or None for a delete.
+    changes = []
+    for index, op in enumerate(payload.operations):
+        if op.op == "create":
+            data = op.item.model_dump()
+            doc = {"_id": str(uuid.uuid4()), **data, **derived_fields(data)}
+            result = ItemBulkResult(index=index, op=op.op, id=doc["_id"], status="ok")
+            writes.append(InsertOne(doc))
+            write_results.append(result)
+            changes.append(doc)
+        elif op.id not in existing:
+            result = ItemBulkResult(index=index, op=op.op, id=op.id, status="not_found")
+        elif op.op == "update":
+            result = ItemBulkResult(index=index, op=op.op, id=op.id, status="ok")
+            update_data = op.item.model_dump(exclude_none=True)
+            update_data.update(derived_fields(update_data))
+            if update_data:
+                writes.append(UpdateOne({"_id": op.id}, {"$set": update_data}))
+                write_results.append(result)
+                changes.append(update_data)
+        else:
+            result = ItemBulkResult(index=index, op=op.op, id=op.id, status="ok")
+            writes.append(DeleteOne({"_id": op.id}))
+            write_results.append(result)
+            changes.append(None)
+        results.append(result)
+
+    if writes:
+        try:
+            details = (await collection.bulk_write(writes, ordered=False)).bulk_api_result
+        except BulkWriteError as exc:
+            details = exc.details
+            for err in details.get("writeErrors", []):
+                write_results[err["index"]].status = "error"
+                write_results[err["index"]].error = (
+                    duplicate_name().detail if err.get("code") == DUPLICATE_KEY else err.get("errmsg")
+                )
+        # Items deleted since the read above match no update; find which, as counts are per batch.
+        updated = [result for result in write_results if result.op == "update" and result.status == "ok"]
+        if details.get("nMatched", 0) < len(updated):
+            cursor = collection.find({"_id": {"$in": [result.id for result in updated]}}, projection={"_id": 1})
+            remaining = {doc["_id"] async for doc in cursor}
+            for result in updated:
+                if result.id not in remaining:
+                    result.status = "not_found"
+
+    # Successive updates to one id build on each other, so patch the index with the running doc.
+    current = dict(existing)
+    for result, change in zip(write_results, changes):
+        if result.status != "ok":
+            continue
+        item_cache.invalidate(result.id)
+        if change is None:
+            search_index.remove(result.id)
+        else:
+            current[result.id] = {**current.get(result.id, {}), **change}
+            search_index.add(current[result.id])
+
+    succeeded = sum(1 for result in results if result.status == "ok")
+    return ItemBulkResponse(results=results, succeeded=succeeded, failed=len(results) - succeeded)
+
+
 @app.get("/items/{item_id}", response_model=ItemResponse)
 async def get_item(item_id: str):
     doc = await get_item_or_404(item_id)
@@ -110,9 +427,15 @@ async def update_item(item_id: str, payload: ItemUpdate):
     collection = get_items_collection()
     doc = await get_item_or_404(item_id)
     update_data = payload.dict(exclude_none=True)
+    update_data.update(derived_fields(update_data))
     if update_data:
-        await collection.update_one({"_id": item_id}, {"$set": update_data})
+        try:
+            await collection.update_one({"_id": item_id}, {"$set": update_data})
+        except DuplicateKeyError:
+            raise duplicate_name()
         doc.update(update_data)
+        item_cache.invalidate(item_id)
+        search_index.add(doc)
     return serialize_item(doc)
 
 
@@ -121,6 +444,8 @@ async def delete_item(item_id: str):
     collection = get_items_collection()
     await get_item_or_404(item_id)
     await collection.delete_one({"_id": item_id})
+    item_cache.invalidate(item_id)
+    search_index.remove(item_id)
     return {}
 
 
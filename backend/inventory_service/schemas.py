@@ -1,5 +1,5 @@
-from typing import Optional
-from pydantic import BaseModel
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
+from pydantic import BaseModel, Field
 
 
 class ItemBase(BaseModel):
@@ -22,10 +22,67 @@ class ItemUpdate(BaseModel):
     default_unit: Optional[str] = None
     description: Optional[str] = None
     barcode: Optional[str] = None
+    price: Optional[str] = None
+    size: Optional[str] = None
 
 
 class ItemResponse(ItemBase):
     id: str
+    # Parsed from price/size on write so the catalog can be filtered and sorted server-side.
+    price_cents: Optional[int] = None
+    size_qty: Optional[float] = None
+    size_unit: Optional[str] = None
+
+
+class ItemPage(BaseModel):
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
+
+class ItemBatchGetRequest(BaseModel):
+    ids: List[str] = Field(min_length=1, max_length=500)
+
+
+class ItemBatchGetResponse(BaseModel):
+    items: List[Optional[ItemResponse]]
+    missing: List[str] = []
+
+
+class ItemBulkCreate(BaseModel):
+    op: Literal["create"]
+    item: ItemCreate
+
+
+class ItemBulkUpdate(BaseModel):
+    op: Literal["update"]
+    id: str
+    item: ItemUpdate
+
+
+class ItemBulkDelete(BaseModel):
+    op: Literal["delete"]
+    id: str
+
+
+ItemBulkOperation = Annotated[Union[ItemBulkCreate, ItemBulkUpdate, ItemBulkDelete], Field(discriminator="op")]
+
+
+class ItemBulkRequest(BaseModel):
+    operations: List[ItemBulkOperation] = Field(min_length=1, max_length=5000)
+
+
+class ItemBulkResult(BaseModel):
+    index: int
+    op: str
+    id: Optional[str] = None
+    status: Literal["ok", "not_found", "error"]
+    error: Optional[str] = None
+
+
+class ItemBulkResponse(BaseModel):
+    results: List[ItemBulkResult]
+    succeeded: int
+    failed: int
 
 
 class CategoryBase(BaseModel):
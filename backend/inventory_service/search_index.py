@@ -0,0 +1,147 @@
+import bisect
+import heapq
+import re
+from typing import Iterable, Optional
+
+GRAM_SIZE = 3
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Casefold and collapse whitespace so lookups ignore case and spacing."""
+    return _WHITESPACE.sub(" ", text or "").strip().casefold()
+
+
+def _grams(text: str) -> set[str]:
+    return {text[i : i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+def _starts_word(name: str, query: str) -> bool:
+    start = name.find(query)
+    while start != -1:
+        if start == 0 or not name[start - 1].isalnum():
+            return True
+        start = name.find(query, start + 1)
+    return False
+
+
+class ItemSearchIndex:
+    """In-process name index backing /items/suggest.
+
+    Whole-name prefix matches come from a sorted list of normalized names (bisect),
+    substring matches from a trigram inverted index verified against the name.
+    Results rank name prefix first, then word prefix, then any substring, by name.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._docs: dict[str, dict] = {}
+        self._keys: dict[str, tuple[str, str]] = {}
+        self._sorted: list[tuple[str, str]] = []
+        self._postings: dict[str, set[str]] = {}
+        # add/remove calls made since begin_load(), replayed over the loaded docs.
+        self._journal: Optional[list[tuple[str, object]]] = None
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def begin_load(self):
+        """Start recording writes; call before reading the docs for load() so none are lost."""
+        self._journal = []
+
+    def cancel_load(self):
+        self._journal = None
+
+    def load(self, docs: Iterable[dict]):
+        """Replace the index contents with docs and mark the index ready.
+
+        Writes recorded since begin_load() are applied on top, as docs may predate them.
+        """
+        docs_by_id: dict[str, dict] = {}
+        keys: dict[str, tuple[str, str]] = {}
+        postings: dict[str, set[str]] = {}
+        for doc in docs:
+            item_id = str(doc.get("_id"))
+            key = (normalize(doc.get("name")), item_id)
+            docs_by_id[item_id] = doc
+            keys[item_id] = key
+            for gram in _grams(key[0]):
+                postings.setdefault(gram, set()).add(item_id)
+        self._docs, self._keys, self._postings = docs_by_id, keys, postings
+        self._sorted = sorted(keys.values())
+        self.ready = True
+        journal, self._journal = self._journal or [], None
+        for op, arg in journal:
+            getattr(self, op)(arg)
+
+    def add(self, doc: dict):
+        """Insert or replace a single item."""
+        if self._journal is not None:
+            self._journal.append(("add", doc))
+        item_id = str(doc.get("_id"))
+        self._remove(item_id)
+        key = (normalize(doc.get("name")), item_id)
+        self._docs[item_id] = doc
+        self._keys[item_id] = key
+        bisect.insort(self._sorted, key)
+        for gram in _grams(key[0]):
+            self._postings.setdefault(gram, set()).add(item_id)
+
+    def remove(self, item_id: str):
+        if self._journal is not None:
+            self._journal.append(("remove", item_id))
+        self._remove(item_id)
+
+    def _remove(self, item_id: str):
+        key = self._keys.pop(item_id, None)
+        if key is None:
+            return
+        self._docs.pop(item_id, None)
+        pos = bisect.bisect_left(self._sorted, key)
+        if pos < len(self._sorted) and self._sorted[pos] == key:
+            del self._sorted[pos]
+        for gram in _grams(key[0]):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del self._postings[gram]
+
+    def search(self, text: str, limit: int) -> list[dict]:
+        query = normalize(text)
+        if not query or limit <= 0:
+            return []
+
+        matches: list[str] = []
+        pos = bisect.bisect_left(self._sorted, (query, ""))
+        while pos < len(self._sorted) and len(matches) < limit:
+            name, item_id = self._sorted[pos]
+            if not name.startswith(query):
+                break
+            matches.append(item_id)
+            pos += 1
+
+        if len(matches) < limit:
+            seen = set(matches)
+            candidates = (item_id for item_id in self._substring_candidates(query) if item_id not in seen)
+            ranked = heapq.nsmallest(
+                limit - len(matches),
+                candidates,
+                key=lambda item_id: (not _starts_word(self._keys[item_id][0], query), self._keys[item_id]),
+            )
+            matches.extend(ranked)
+
+        return [self._docs[item_id] for item_id in matches]
+
+    def _substring_candidates(self, query: str) -> Iterable[str]:
+        if len(query) < GRAM_SIZE:
+            return (item_id for name, item_id in self._sorted if query in name)
+        postings = []
+        for gram in _grams(query):
+            ids = self._postings.get(gram)
+            if not ids:
+                return ()
+            postings.append(ids)
+        postings.sort(key=len)
+        ids = set(postings[0]).intersection(*postings[1:])
+        return (item_id for item_id in ids if query in self._keys[item_id][0])
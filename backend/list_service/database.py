@@ -1,19 +1,30 @@
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
+from mongo import get_client
+from pymongo import ASCENDING, IndexModel
 
 load_dotenv()
 
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 DB_NAME = os.getenv("LIST_DB_NAME", "smart_shopping_lists")
-
-_client: AsyncIOMotorClient | None = None
-
-def get_client() -> AsyncIOMotorClient:
-    global _client
-    if _client is None:
-        _client = AsyncIOMotorClient(MONGO_URI)
-    return _client
+# How long deleted lists/items are remembered for delta sync; older sync tokens get a full reset.
+TOMBSTONE_RETENTION_DAYS = int(os.getenv("LIST_TOMBSTONE_RETENTION_DAYS", "30"))
+
+# Indexes this service relies on; ensured on startup and checked by `python indexes.py --check`.
+# items.item_id and updated_at serve the recommender's co-occurrence lookup and sync over this collection.
+INDEXES = {
+    "lists": [
+        IndexModel([("user_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)], background=True),
+        IndexModel([("items.item_id", ASCENDING)], background=True),
+        IndexModel([("user_id", ASCENDING), ("updated_at", ASCENDING)], background=True),
+        IndexModel([("updated_at", ASCENDING)], background=True),
+    ],
+    "list_tombstones": [
+        IndexModel([("user_id", ASCENDING), ("deleted_at", ASCENDING)], background=True),
+        IndexModel([("deleted_at", ASCENDING)], expireAfterSeconds=TOMBSTONE_RETENTION_DAYS * 86400, background=True),
+    ],
+    # Change-feed relay (LIST_EVENTS_BACKEND=mongo); entries only need to outlive a stream resume.
+    "list_events": [IndexModel([("created_at", ASCENDING)], expireAfterSeconds=3600, background=True)],
+}
 
 
 def get_database():
@@ -22,3 +33,11 @@ def get_database():
 
 def get_lists_collection():
     return get_database()["lists"]
+
+
+def get_events_collection():
+    return get_database()["list_events"]
+
+
+def get_tombstones_collection():
+    return get_database()["list_tombstones"]
@@ -0,0 +1,99 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from database import get_events_collection
+
+# "memory" fans out within this process only (single worker, tests); "mongo" relays events
+# through a change stream on the list_events collection so every worker sees every write
+# (requires a replica set).
+LIST_EVENTS_BACKEND = os.getenv("LIST_EVENTS_BACKEND", "memory")
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("LIST_EVENTS_QUEUE_SIZE", "100"))
+
+
+class Subscription:
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        # Set when the client fell too far behind; it should refetch the list and reconnect.
+        self.overflowed = False
+
+    def deliver(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class InMemoryEventBus:
+    """Per-list fan-out of change events to the subscribers connected to this process."""
+
+    def __init__(self):
+        self._subscribers: dict[str, set[Subscription]] = {}
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, list_id: str, events: list[dict]):
+        self._fan_out(list_id, events)
+
+    def _fan_out(self, list_id: str, events: list[dict]):
+        for subscription in list(self._subscribers.get(list_id, ())):
+            for event in events:
+                subscription.deliver(event)
+
+    @asynccontextmanager
+    async def subscribe(self, list_id: str):
+        subscription = Subscription()
+        self._subscribers.setdefault(list_id, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscribers = self._subscribers.get(list_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[list_id]
+
+
+class MongoEventBus(InMemoryEventBus):
+    """Publishes by inserting into list_events and fans out whatever the change stream delivers."""
+
+    def __init__(self):
+        super().__init__()
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def publish(self, list_id: str, events: list[dict]):
+        await get_events_collection().insert_one({"list_id": list_id, "events": events, "created_at": datetime.utcnow()})
+
+    async def _watch(self):
+        collection = get_events_collection()
+        resume_token = None
+        while True:
+            try:
+                async with collection.watch([{"$match": {"operationType": "insert"}}], resume_after=resume_token) as stream:
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        doc = change["fullDocument"]
+                        self._fan_out(doc["list_id"], doc["events"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                print(f"[list_service] list event stream interrupted: {exc}")
+                await asyncio.sleep(1)
+
+
+def create_event_bus() -> InMemoryEventBus:
+    if LIST_EVENTS_BACKEND == "mongo":
+        return MongoEventBus()
+    return InMemoryEventBus()
@@ -1,20 +1,45 @@
+import asyncio
+import base64
+import json
 import time
 import uuid
-from datetime import datetime
-from typing import List as ListType
+from datetime import datetime, timedelta
+from typing import List as ListType, Literal, Optional, Union
 
 from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, HTTPException, Request, status
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from pymongo import ReturnDocument
 
-from auth import get_current_user
-from database import get_lists_collection
+from auth import get_current_user, get_stream_user, token_cache
+from database import TOMBSTONE_RETENTION_DAYS, get_lists_collection, get_tombstones_collection
+from events import create_event_bus
+from indexes import provision_indexes
+from mongo import close_client, pool_stats, warm_up
 from metrics import send_metric
-from schemas import ListCreate, ListItemCreate, ListItemResponse, ListItemUpdate, ListResponse, ListUpdate
+from schemas import (
+    ListChange,
+    ListChanges,
+    ListCreate,
+    ListItemBatch,
+    ListItemCreate,
+    ListItemResponse,
+    ListItemUpdate,
+    ListPage,
+    ListResponse,
+    ListSummary,
+    ListUpdate,
+)
 
 load_dotenv()
 
 SERVICE_NAME = "list_service"
+EVENT_KEEPALIVE_SECONDS = 15
+# Delta sync re-reads this far behind the token to absorb clock skew between service instances.
+SYNC_OVERLAP = timedelta(seconds=5)
+# Item tombstones kept per list; if more were dropped since a token, the list is sent in full.
+ITEM_TOMBSTONE_CAP = 500
 app = FastAPI(title="Smart Shopping List - List Service")
 
 app.add_middleware(
@@ -23,6 +48,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 
@@ -34,18 +60,48 @@ async def record_metrics(request: Request, call_next):
     return response
 
 
+@app.on_event("startup")
+async def start_index_provisioning():
+    # Runs in the background so a slow index build or unreachable Mongo doesn't block startup.
+    app.state.index_task = asyncio.create_task(provision_indexes(SERVICE_NAME))
+
+
+event_bus = create_event_bus()
+
+
+@app.on_event("startup")
+async def start_event_bus():
+    await event_bus.start()
+
+
+@app.on_event("shutdown")
+async def stop_event_bus():
+    await event_bus.stop()
+
+
+@app.on_event("startup")
+async def start_mongo_pool():
+    app.state.mongo_warm_up_task = asyncio.create_task(warm_up(SERVICE_NAME))
+
+
+@app.on_event("shutdown")
+async def close_mongo_pool():
+    close_client()
+
+
+def serialize_list_item(item) -> ListItemResponse:
+    return ListItemResponse(
+        id=item.get("id"),
+        item_id=item.get("item_id"),
+        quantity=item.get("quantity", 1),
+        unit=item.get("unit"),
+        notes=item.get("notes"),
+        checked=item.get("checked", False),
+    )
+
+
 def serialize_list(doc) -> ListResponse:
-    items = [
-        ListItemResponse(
-            id=item.get("id"),
-            item_id=item.get("item_id"),
-            quantity=item.get("quantity", 1),
-            unit=item.get("unit"),
-            notes=item.get("notes"),
-            checked=item.get("checked", False),
-        )
-        for item in doc.get("items", [])
-    ]
+    items = [serialize_list_item(item) for item in doc.get("items", [])]
     return ListResponse(
         id=doc.get("_id"),
         user_id=doc.get("user_id"),
@@ -53,6 +109,7 @@ def serialize_list(doc) -> ListResponse:
         description=doc.get("description"),
         items=items,
         created_at=doc.get("created_at"),
+        version=doc.get("version", 0),
     )
 
 
@@ -61,29 +118,168 @@ async def health():
     return {"service": SERVICE_NAME, "status": "ok"}
 
 
-@app.get("/lists", response_model=list[ListResponse])
-async def list_lists(current_user=Depends(get_current_user)):
+@app.get("/health/pool")
+async def health_pool():
+    return {"service": SERVICE_NAME, **pool_stats.snapshot()}
+
+
+@app.get("/health/auth-cache")
+async def health_auth_cache():
+    return {"service": SERVICE_NAME, "tokens": token_cache.stats()}
+
+
+SUMMARY_PROJECTION = {
+    "user_id": 1,
+    "name": 1,
+    "description": 1,
+    "created_at": 1,
+    "item_count": {"$size": {"$ifNull": ["$items", []]}},
+    "checked_count": {
+        "$size": {"$filter": {"input": {"$ifNull": ["$items", []]}, "as": "item", "cond": {"$eq": ["$$item.checked", True]}}}
+    },
+}
+
+
+def serialize_summary(doc) -> ListSummary:
+    return ListSummary(
+        id=doc.get("_id"),
+        user_id=doc.get("user_id"),
+        name=doc.get("name"),
+        description=doc.get("description"),
+        created_at=doc.get("created_at"),
+        item_count=doc.get("item_count", 0),
+        checked_count=doc.get("checked_count", 0),
+    )
+
+
+def encode_cursor(doc) -> str:
+    created_at = doc.get("created_at")
+    raw = json.dumps([created_at.isoformat() if created_at else None, doc.get("_id")]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        created_at, list_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), list_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+@app.get("/lists", response_model=Union[list[ListResponse], list[ListSummary], ListPage])
+async def list_lists(
+    view: Literal["full", "summary"] = "full",
+    limit: Optional[int] = Query(default=None, ge=1, le=500),
+    after: Optional[str] = None,
+    current_user=Depends(get_current_user),
+):
     collection = get_lists_collection()
-    cursor = collection.find({"user_id": current_user["id"]})
-    results: ListType[ListResponse] = []
-    async for doc in cursor:
-        results.append(serialize_list(doc))
-    return results
+    match = {"user_id": current_user["id"]}
+    if after:
+        if limit is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="after requires limit")
+        created_at, list_id = decode_cursor(after)
+        match["$or"] = [{"created_at": {"$gt": created_at}}, {"created_at": created_at, "_id": {"$gt": list_id}}]
+
+    # Keyset on (created_at, _id) within the user's lists; served by the user_id/created_at/_id index.
+    pipeline = [{"$match": match}]
+    if limit is not None:
+        pipeline += [{"$sort": {"created_at": 1, "_id": 1}}, {"$limit": limit}]
+    if view == "summary":
+        pipeline.append({"$project": SUMMARY_PROJECTION})
+    serialize = serialize_summary if view == "summary" else serialize_list
+    docs = [doc async for doc in collection.aggregate(pipeline)]
+    results = [serialize(doc) for doc in docs]
+    if limit is None:
+        return results
+    next_cursor = encode_cursor(docs[-1]) if len(docs) == limit else None
+    return ListPage(lists=results, next_cursor=next_cursor)
+
+
+def encode_sync_token(moment: datetime) -> str:
+    return base64.urlsafe_b64encode(moment.isoformat().encode()).decode()
+
+
+def decode_sync_token(token: str) -> datetime:
+    try:
+        return datetime.fromisoformat(base64.urlsafe_b64decode(token.encode()).decode())
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sync token")
+
+
+def serialize_change(doc, since: Optional[datetime]) -> ListChange:
+    items = doc.get("items", [])
+    tombstones = doc.get("deleted_items", [])
+    # If the capped tombstone array no longer reaches back to `since`, deletions may be missing.
+    complete = since is None or (len(tombstones) >= ITEM_TOMBSTONE_CAP and tombstones[0].get("deleted_at") > since)
+    if not complete:
+        items = [item for item in items if item.get("updated_at") and item["updated_at"] > since]
+    removed = [] if complete else [t.get("id") for t in tombstones if t.get("deleted_at") > since]
+    return ListChange(
+        id=doc.get("_id"),
+        user_id=doc.get("user_id"),
+        name=doc.get("name"),
+        description=doc.get("description"),
+        created_at=doc.get("created_at"),
+        updated_at=doc.get("updated_at"),
+        version=doc.get("version", 0),
+        items=[serialize_list_item(item) for item in items],
+        removed_item_ids=removed,
+        items_complete=complete,
+    )
+
+
+@app.get("/lists/changes", response_model=ListChanges)
+async def list_changes(since: Optional[str] = None, current_user=Depends(get_current_user)):
+    """Delta sync: lists and items changed or deleted since the token from the previous call.
+
+    Omit `since` (or send one older than the tombstone retention) for a full reset.
+    """
+    next_token = encode_sync_token(datetime.utcnow())
+    cutoff = None
+    if since:
+        cutoff = decode_sync_token(since) - SYNC_OVERLAP
+        if cutoff < datetime.utcnow() - timedelta(days=TOMBSTONE_RETENTION_DAYS):
+            cutoff = None
+
+    match = {"user_id": current_user["id"]}
+    deleted_list_ids: ListType[str] = []
+    if cutoff is not None:
+        match["updated_at"] = {"$gt": cutoff}
+        tombstones = get_tombstones_collection().find(
+            {"user_id": current_user["id"], "deleted_at": {"$gt": cutoff}}, projection={"list_id": 1}
+        )
+        deleted_list_ids = [doc["list_id"] async for doc in tombstones]
+    lists = [serialize_change(doc, cutoff) async for doc in get_lists_collection().find(match)]
+    return ListChanges(lists=lists, deleted_list_ids=deleted_list_ids, next_token=next_token, reset=cutoff is None)
+
+
+def list_event(doc, event_type: str, **data) -> dict:
+    return {"type": event_type, "list_id": doc.get("_id"), "version": doc.get("version", 0), **data}
+
+
+def item_event(doc, event_type: str, list_item_id: str) -> dict:
+    item = next((item for item in doc.get("items", []) if item.get("id") == list_item_id), None)
+    return list_event(doc, event_type, item=serialize_list_item(item).model_dump() if item else None)
 
 
 @app.post("/lists", response_model=ListResponse, status_code=status.HTTP_201_CREATED)
-async def create_list(payload: ListCreate, current_user=Depends(get_current_user)):
+async def create_list(payload: ListCreate, response: Response, current_user=Depends(get_current_user)):
     collection = get_lists_collection()
     list_id = str(uuid.uuid4())
+    now = datetime.utcnow()
     doc = {
         "_id": list_id,
         "user_id": current_user["id"],
         "name": payload.name,
         "description": payload.description,
-        "created_at": datetime.utcnow(),
+        "created_at": now,
+        "updated_at": now,
         "items": [],
+        "version": 1,
     }
     await collection.insert_one(doc)
+    response.headers["ETag"] = list_etag(doc)
     return serialize_list(doc)
 
 
@@ -95,73 +291,278 @@ async def get_user_list(list_id: str, user_id: str):
     return doc
 
 
+# Every list mutation bumps `version`; it is exposed as the ETag so clients can poll with
+# If-None-Match and guard writes with If-Match. Lists created before versioning count as 0.
+def list_etag(doc) -> str:
+    return f'"{doc.get("version", 0)}"'
+
+
+def parse_etag(value: str) -> Optional[int]:
+    value = value.strip()
+    if value == "*":
+        return None
+    try:
+        return int(value.removeprefix("W/").strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid ETag")
+
+
+async def update_user_list(list_id: str, user_id: str, update, if_match: Optional[str], extra_query: Optional[dict] = None):
+    """Apply one atomic update (operator doc or pipeline), bump the version and stamp updated_at.
+
+    Raises 404 for a missing list and 412 when If-Match no longer matches; returns None
+    when the list exists but extra_query did not match, so callers can report their own 404.
+    """
+    collection = get_lists_collection()
+    query = {"_id": list_id, "user_id": user_id, **(extra_query or {})}
+    expected = parse_etag(if_match) if if_match else None
+    if expected is not None:
+        query["version"] = expected or None
+    now = datetime.utcnow()
+    if isinstance(update, list):
+        update = update + [{"$set": {"version": {"$add": [{"$ifNull": ["$version", 0]}, 1]}, "updated_at": now}}]
+    else:
+        update = {**update, "$set": {**update.get("$set", {}), "updated_at": now}, "$inc": {"version": 1}}
+    doc = await collection.find_one_and_update(query, update, return_document=ReturnDocument.AFTER)
+    if doc:
+        return doc
+    current = await get_user_list(list_id, user_id)
+    if expected is not None and current.get("version", 0) != expected:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="List was modified")
+    return None
+
+
+def list_response(response: Response, doc) -> ListResponse:
+    response.headers["ETag"] = list_etag(doc)
+    return serialize_list(doc)
+
+
 @app.get("/lists/{list_id}", response_model=ListResponse)
-async def get_list(list_id: str, current_user=Depends(get_current_user)):
+async def get_list(
+    list_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+    current_user=Depends(get_current_user),
+):
+    if if_none_match:
+        # Cheap version-only read; an unchanged list costs no item transfer or serialization.
+        collection = get_lists_collection()
+        head = await collection.find_one({"_id": list_id, "user_id": current_user["id"]}, projection={"version": 1})
+        if head and list_etag(head) in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": list_etag(head)})
     doc = await get_user_list(list_id, current_user["id"])
-    return serialize_list(doc)
+    return list_response(response, doc)
 
 
 @app.put("/lists/{list_id}", response_model=ListResponse)
-async def update_list(list_id: str, payload: ListUpdate, current_user=Depends(get_current_user)):
-    collection = get_lists_collection()
-    doc = await get_user_list(list_id, current_user["id"])
+async def update_list(
+    list_id: str,
+    payload: ListUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
+    current_user=Depends(get_current_user),
+):
     update_data = {k: v for k, v in payload.dict(exclude_none=True).items()}
-    if update_data:
-        await collection.update_one({"_id": list_id}, {"$set": update_data})
-        doc.update(update_data)
-    return serialize_list(doc)
+    if not update_data:
+        return list_response(response, await get_user_list(list_id, current_user["id"]))
+    doc = await update_user_list(list_id, current_user["id"], {"$set": update_data}, if_match)
+    await event_bus.publish(list_id, [list_event(doc, "list_updated", changes=update_data)])
+    return list_response(response, doc)
 
 
 @app.delete("/lists/{list_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_list(list_id: str, current_user=Depends(get_current_user)):
+async def delete_list(list_id: str, if_match: Optional[str] = Header(default=None), current_user=Depends(get_current_user)):
     collection = get_lists_collection()
-    await get_user_list(list_id, current_user["id"])
-    await collection.delete_one({"_id": list_id})
+    query = {"_id": list_id, "user_id": current_user["id"]}
+    expected = parse_etag(if_match) if if_match else None
+    if expected is not None:
+        query["version"] = expected or None
+    result = await collection.delete_one(query)
+    if not result.deleted_count:
+        await get_user_list(list_id, current_user["id"])
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="List was modified")
+    await get_tombstones_collection().insert_one(
+        {"list_id": list_id, "user_id": current_user["id"], "deleted_at": datetime.utcnow()}
+    )
+    await event_bus.publish(list_id, [{"type": "list_deleted", "list_id": list_id, "version": None}])
     return {}
 
 
-@app.post("/lists/{list_id}/items", response_model=ListResponse)
-async def add_list_item(list_id: str, payload: ListItemCreate, current_user=Depends(get_current_user)):
-    collection = get_lists_collection()
-    doc = await get_user_list(list_id, current_user["id"])
-    list_item = {
+def new_list_item(payload: ListItemCreate) -> dict:
+    return {
         "id": str(uuid.uuid4()),
         "item_id": payload.item_id,
         "quantity": payload.quantity,
         "unit": payload.unit,
         "notes": payload.notes,
         "checked": payload.checked,
+        "updated_at": datetime.utcnow(),
     }
-    doc.setdefault("items", []).append(list_item)
-    await collection.update_one({"_id": list_id}, {"$set": {"items": doc["items"]}})
-    return serialize_list(doc)
+
+
+# List item edits are single atomic updates on the embedded array ($push/$pull/positional $set),
+# so concurrent edits from several devices don't overwrite each other.
+@app.post("/lists/{list_id}/items", response_model=ListResponse)
+async def add_list_item(
+    list_id: str,
+    payload: ListItemCreate,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
+    current_user=Depends(get_current_user),
+):
+    list_item = new_list_item(payload)
+    doc = await update_user_list(list_id, current_user["id"], {"$push": {"items": list_item}}, if_match)
+    await event_bus.publish(list_id, [item_event(doc, "item_added", list_item["id"])])
+    return list_response(response, doc)
+
+
+def batch_items_expression(payload: ListItemBatch) -> tuple[dict, list[str], list[dict], list[str]]:
+    """Fold a batch into one `items` aggregation expression: removes, then per-item merges, then appends.
+
+    Returns the expression, the ids it expects to exist (update/check targets), and the
+    added items and removed ids for change events.
+    """
+    now = datetime.utcnow()
+    added: ListType[dict] = []
+    removed: ListType[str] = []
+    changes: dict[str, dict] = {}
+    for op in payload.operations:
+        if op.op == "add":
+            added.append(new_list_item(op.item))
+        elif op.op == "remove":
+            removed.append(op.id)
+        elif op.op == "update":
+            changes.setdefault(op.id, {}).update(op.changes.dict(exclude_none=True))
+        else:
+            changes.setdefault(op.id, {})["checked"] = op.checked
+
+    items = {"$ifNull": ["$items", []]}
+    if removed:
+        items = {"$filter": {"input": items, "as": "item", "cond": {"$not": [{"$in": ["$$item.id", {"$literal": removed}]}]}}}
+    branches = [
+        {
+            "case": {"$eq": ["$$item.id", {"$literal": item_id}]},
+            "then": {"$mergeObjects": ["$$item", {"$literal": {**data, "updated_at": now}}]},
+        }
+        for item_id, data in changes.items()
+        if data
+    ]
+    if branches:
+        items = {"$map": {"input": items, "as": "item", "in": {"$switch": {"branches": branches, "default": "$$item"}}}}
+    if added:
+        items = {"$concatArrays": [items, {"$literal": added}]}
+    return items, list(changes), added, removed
+
+
+@app.patch("/lists/{list_id}/items", response_model=ListResponse)
+async def batch_list_items(
+    list_id: str,
+    payload: ListItemBatch,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
+    current_user=Depends(get_current_user),
+):
+    items, targets, added, removed = batch_items_expression(payload)
+    stage = {"items": items}
+    if removed:
+        tombstones = [{"id": item_id, "deleted_at": datetime.utcnow()} for item_id in removed]
+        stage["deleted_items"] = {
+            "$slice": [{"$concatArrays": [{"$ifNull": ["$deleted_items", []]}, {"$literal": tombstones}]}, -ITEM_TOMBSTONE_CAP]
+        }
+    # All-or-nothing: the update only matches if every item being changed is still on the list.
+    extra_query = {"items.id": {"$all": targets}} if targets else None
+    doc = await update_user_list(list_id, current_user["id"], [{"$set": stage}], if_match, extra_query)
+    if not doc:
+        current = await get_user_list(list_id, current_user["id"])
+        present = {item.get("id") for item in current.get("items", [])}
+        missing = [item_id for item_id in targets if item_id not in present]
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"List items not found: {', '.join(missing)}")
+    events = [list_event(doc, "item_removed", item_id=item_id) for item_id in removed]
+    events += [item_event(doc, "item_updated", item_id) for item_id in targets if item_id not in removed]
+    events += [item_event(doc, "item_added", item["id"]) for item in added]
+    await event_bus.publish(list_id, events)
+    return list_response(response, doc)
 
 
 @app.put("/lists/{list_id}/items/{list_item_id}", response_model=ListResponse)
-async def update_list_item(list_id: str, list_item_id: str, payload: ListItemUpdate, current_user=Depends(get_current_user)):
-    collection = get_lists_collection()
-    doc = await get_user_list(list_id, current_user["id"])
-    updated = False
-    for item in doc.get("items", []):
-        if item.get("id") == list_item_id:
-            data = payload.dict(exclude_none=True)
-            item.update(data)
-            updated = True
-            break
-    if not updated:
+async def update_list_item(
+    list_id: str,
+    list_item_id: str,
+    payload: ListItemUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
+    current_user=Depends(get_current_user),
+):
+    data = payload.dict(exclude_none=True)
+    if data:
+        update = {"$set": {f"items.$.{key}": value for key, value in {**data, "updated_at": datetime.utcnow()}.items()}}
+        doc = await update_user_list(list_id, current_user["id"], update, if_match, {"items.id": list_item_id})
+        if doc:
+            await event_bus.publish(list_id, [item_event(doc, "item_updated", list_item_id)])
+    else:
+        collection = get_lists_collection()
+        doc = await collection.find_one({"_id": list_id, "user_id": current_user["id"], "items.id": list_item_id})
+        if not doc:
+            # Distinguish a missing list from a missing item for the 404 detail.
+            await get_user_list(list_id, current_user["id"])
+    if not doc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="List item not found")
-    await collection.update_one({"_id": list_id}, {"$set": {"items": doc.get("items", [])}})
-    return serialize_list(doc)
+    return list_response(response, doc)
 
 
 @app.delete("/lists/{list_id}/items/{list_item_id}", response_model=ListResponse)
-async def delete_list_item(list_id: str, list_item_id: str, current_user=Depends(get_current_user)):
+async def delete_list_item(
+    list_id: str,
+    list_item_id: str,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
+    current_user=Depends(get_current_user),
+):
+    update = {
+        "$pull": {"items": {"id": list_item_id}},
+        "$push": {
+            "deleted_items": {"$each": [{"id": list_item_id, "deleted_at": datetime.utcnow()}], "$slice": -ITEM_TOMBSTONE_CAP}
+        },
+    }
+    doc = await update_user_list(list_id, current_user["id"], update, if_match, {"items.id": list_item_id})
+    if not doc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="List item not found")
+    await event_bus.publish(list_id, [list_event(doc, "item_removed", item_id=list_item_id)])
+    return list_response(response, doc)
+
+
+def sse_message(event: dict) -> str:
+    return f"event: {event['type']}\nid: {event.get('version')}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+@app.get("/lists/{list_id}/events")
+async def stream_list_events(list_id: str, request: Request, current_user=Depends(get_stream_user)):
+    """Server-Sent Events feed of item-level changes to one list, replacing polling of GET /lists/{id}."""
+    await get_user_list(list_id, current_user["id"])
     collection = get_lists_collection()
-    doc = await get_user_list(list_id, current_user["id"])
-    items = [item for item in doc.get("items", []) if item.get("id") != list_item_id]
-    doc["items"] = items
-    await collection.update_one({"_id": list_id}, {"$set": {"items": items}})
-    return serialize_list(doc)
+
+    async def stream():
+        async with event_bus.subscribe(list_id) as subscription:
+            # Subscribed before reading the version, so clients holding an older version
+            # know to refetch once and can then apply deltas.
+            head = await collection.find_one({"_id": list_id}, projection={"version": 1})
+            yield sse_message({"type": "ready", "list_id": list_id, "version": (head or {}).get("version", 0)})
+            while True:
+                if subscription.overflowed:
+                    yield sse_message({"type": "resync", "list_id": list_id, "version": None})
+                    return
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=EVENT_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                yield sse_message(event)
+                if event["type"] == "list_deleted":
+                    return
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 
 # Developer note: All list operations are scoped to the authenticated user via JWT bearer tokens.
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Annotated, List, Literal, Optional, Union
 from datetime import datetime
 from pydantic import BaseModel, Field
 
@@ -18,6 +18,37 @@ class ListItemUpdate(BaseModel):
     checked: Optional[bool] = None
 
 
+class ListItemAddOp(BaseModel):
+    op: Literal["add"]
+    item: ListItemCreate
+
+
+class ListItemUpdateOp(BaseModel):
+    op: Literal["update"]
+    id: str
+    changes: ListItemUpdate
+
+
+class ListItemRemoveOp(BaseModel):
+    op: Literal["remove"]
+    id: str
+
+
+class ListItemCheckOp(BaseModel):
+    op: Literal["check"]
+    id: str
+    checked: bool = True
+
+
+ListItemOperation = Annotated[
+    Union[ListItemAddOp, ListItemUpdateOp, ListItemRemoveOp, ListItemCheckOp], Field(discriminator="op")
+]
+
+
+class ListItemBatch(BaseModel):
+    operations: List[ListItemOperation] = Field(min_length=1, max_length=500)
+
+
 class ListCreate(BaseModel):
     name: str
     description: Optional[str] = None
@@ -44,3 +75,41 @@ class ListResponse(BaseModel):
     description: Optional[str] = None
     items: List[ListItemResponse] = []
     created_at: Optional[datetime] = None
+    version: int = 0
+
+
+class ListSummary(BaseModel):
+    id: str
+    user_id: str
+    name: str
+    description: Optional[str] = None
+    created_at: Optional[datetime] = None
+    item_count: int = 0
+    checked_count: int = 0
+
+
+class ListPage(BaseModel):
+    lists: List[Union[ListSummary, ListResponse]]
+    next_cursor: Optional[str] = None
+
+
+class ListChange(BaseModel):
+    id: str
+    user_id: str
+    name: str
+    description: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    version: int = 0
+    # Items added or modified since the token; the full item set when items_complete is true.
+    items: List[ListItemResponse] = []
+    removed_item_ids: List[str] = []
+    items_complete: bool = False
+
+
+class ListChanges(BaseModel):
+    lists: List[ListChange]
+    deleted_list_ids: List[str] = []
+    next_token: str
+    # True when the client must drop its local copy and replace it with this response.
+    reset: bool = False
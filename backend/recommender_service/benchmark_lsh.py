@@ -0,0 +1,97 @@
+import argparse
+import asyncio
+import random
+import time
+from typing import Optional
+
+from cooccurrence import list_item_ids, score_lists
+from database import get_lists_collection
+from lsh import ListLSH
+
+TOP_N = 10
+
+
+def synthetic_lists(count: int, items: int, themes: int, rng: random.Random) -> list[tuple[str, list[str]]]:
+    """Lists that mostly draw from one theme (a store aisle, a recipe), with some noise."""
+    catalog = [f"item-{n}" for n in range(items)]
+    per_theme = [catalog[theme::themes] for theme in range(themes)]
+    lists = []
+    for n in range(count):
+        theme = per_theme[rng.randrange(themes)]
+        size = rng.randint(3, 15)
+        chosen = {rng.choice(theme) if rng.random() < 0.8 else rng.choice(catalog) for _ in range(size)}
+        lists.append((f"list-{n}", sorted(chosen)))
+    return lists
+
+
+async def lists_from_db() -> list[tuple[str, list[str]]]:
+    return [(doc["_id"], list_item_ids(doc)) async for doc in get_lists_collection().find({}, projection={"items.item_id": 1})]
+
+
+def sample_carts(lists: list[tuple[str, list[str]]], queries: int, rng: random.Random) -> list[tuple[str, set[str]]]:
+    """Carts are 2-5 items of an existing list, scored the way that list's own page would be."""
+    eligible = [entry for entry in lists if len(entry[1]) >= 2]
+    carts = []
+    for list_id, items in rng.sample(eligible, min(queries, len(eligible))):
+        carts.append((list_id, set(rng.sample(items, min(len(items), rng.randint(2, 5))))))
+    return carts
+
+
+def top(scores) -> set[str]:
+    return {item for item, _ in scores.most_common(TOP_N)}
+
+
+def run(lists, carts, configs: list[tuple[int, int]], max_lists: int):
+    indexed = [(list_id, set(items)) for list_id, items in lists]
+    start = time.perf_counter()
+    exact = [top(score_lists(indexed, cart, list_id)) for list_id, cart in carts]
+    exact_ms = (time.perf_counter() - start) * 1000 / len(carts)
+    print(f"{len(lists)} lists, {len(carts)} carts; exact scan {exact_ms:.2f} ms/cart")
+    print(f"{'bands':>5} {'rows':>4} {'build s':>8} {'ms/cart':>8} {'speedup':>8} {'recall@10':>9} {'lists/cart':>10}")
+    for bands, rows in configs:
+        index = ListLSH.build(lists, bands, rows)
+        hits = total = candidates = 0
+        start = time.perf_counter()
+        results = [top(index.scores(cart, list_id, max_lists)) for list_id, cart in carts]
+        elapsed_ms = (time.perf_counter() - start) * 1000 / len(carts)
+        for (list_id, cart), expected, found in zip(carts, exact, results):
+            hits += len(expected & found)
+            total += len(expected)
+            candidates += len(index.similar_lists(cart, max_lists))
+        recall = hits / total if total else 1.0
+        print(
+            f"{bands:>5} {rows:>4} {index.build_seconds:>8.2f} {elapsed_ms:>8.2f} "
+            f"{exact_ms / elapsed_ms if elapsed_ms else 0:>7.1f}x {recall:>9.3f} {candidates / len(carts):>10.1f}"
+        )
+
+
+def parse_configs(bands: str, rows: str) -> list[tuple[int, int]]:
+    return [(int(b), int(r)) for b in bands.split(",") for r in rows.split(",")]
+
+
+async def main(args: argparse.Namespace):
+    rng = random.Random(args.seed)
+    lists = await lists_from_db() if args.from_db else synthetic_lists(args.lists, args.items, args.themes, rng)
+    carts = sample_carts(lists, args.queries, rng)
+    if not carts:
+        print("No lists with 2+ items to benchmark.")
+        return
+    run(lists, carts, parse_configs(args.bands, args.rows), args.max_lists)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Recall and latency of LSH recommendations against the exact list scan.")
+    parser.add_argument("--from-db", action="store_true", help="use the lists collection instead of synthetic lists")
+    parser.add_argument("--lists", type=int, default=50000, help="synthetic lists to generate")
+    parser.add_argument("--items", type=int, default=2000, help="synthetic catalog size")
+    parser.add_argument("--themes", type=int, default=40, help="synthetic item clusters lists draw from")
+    parser.add_argument("--queries", type=int, default=200, help="carts to score")
+    parser.add_argument("--bands", default="16,32,64", help="comma-separated band counts to try")
+    parser.add_argument("--rows", default="1,2", help="comma-separated rows per band to try")
+    parser.add_argument("--max-lists", type=int, default=500, help="similar lists scored per cart (LSH_MAX_LISTS)")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,300 @@
+import argparse
+import asyncio
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from database import (
+    INDEXES,
+    get_database,
+    get_lists_collection,
+    get_pairs_collection,
+    get_snapshots_collection,
+    get_state_collection,
+    get_tombstones_collection,
+)
+
+# Item x item co-occurrence over every list, kept in the recommender DB:
+#   item_pairs      {item_id, other_id, lists, weight}  one doc per ordered pair; `lists` counts lists
+#                   holding both items, `weight` sums 1/len(list) over them
+#   list_snapshots  {_id: list_id, items, pending}       item set last applied for each list, plus
+#                   changes whose delta is not written yet
+#   cooccurrence_state {_id: "sync", checkpoint, version} lists.updated_at already applied; version
+#                   counts writes so every worker can tell the matrix changed
+# Snapshots make updates idempotent: a list's old contribution is subtracted and the new one
+# added only by whoever wins the compare-and-set on its snapshot. The winner records the change
+# in `pending` in that same write and pulls it once the delta is written, so a worker that dies
+# in between leaves the change for the next sync to finish instead of losing it.
+
+# Re-read this far behind the checkpoint to absorb clock skew between list_service instances.
+SYNC_OVERLAP = timedelta(seconds=5)
+# A pending change this old is taken to be abandoned by its worker and finished by sync_changes.
+PENDING_TIMEOUT = timedelta(minutes=5)
+WRITE_BATCH_SIZE = 1000
+
+
+def list_item_ids(doc) -> list[str]:
+    return sorted({item.get("item_id") for item in doc.get("items", []) if item.get("item_id")})
+
+
+def add_pairs(items: list[str], sign: int, pairs: dict):
+    if len(items) < 2:
+        return
+    share = sign / len(items)
+    for a in items:
+        for b in items:
+            if a != b:
+                entry = pairs.setdefault((a, b), [0, 0.0])
+                entry[0] += sign
+                entry[1] += share
+
+
+async def bulk_write(collection, ops: list):
+    for start in range(0, len(ops), WRITE_BATCH_SIZE):
+        await collection.bulk_write(ops[start : start + WRITE_BATCH_SIZE], ordered=False)
+
+
+async def write_delta(old: list[str], new: list[str]):
+    pairs: dict = {}
+    add_pairs(old, -1, pairs)
+    add_pairs(new, 1, pairs)
+    pair_ops = [
+        UpdateOne({"item_id": a, "other_id": b}, {"$inc": {"lists": lists, "weight": weight}}, upsert=True)
+        for (a, b), (lists, weight) in pairs.items()
+        if lists or abs(weight) > 1e-12
+    ]
+    if pair_ops:
+        await bulk_write(get_pairs_collection(), pair_ops)
+        await get_pairs_collection().delete_many({"item_id": {"$in": old}, "lists": {"$lte": 0}})
+
+
+async def finish_change(list_id: str, change: dict):
+    """Write a recorded change's delta, then drop it from pending (and the snapshot, once empty).
+
+    The $inc delta is not idempotent: a write that failed partway is re-applied whole when the
+    change is retried, so rebuild() remains the way to correct any drift that leaves.
+    """
+    await write_delta(change["old"], change["new"])
+    snapshots = get_snapshots_collection()
+    await snapshots.update_one({"_id": list_id}, {"$pull": {"pending": {"id": change["id"]}}})
+    if not change["new"]:
+        await snapshots.delete_one({"_id": list_id, "items": [], "pending": {"$size": 0}})
+
+
+async def read_list_items(list_id: str) -> list[str]:
+    """A list's items as stored now; [] once it is deleted."""
+    doc = await get_lists_collection().find_one({"_id": list_id}, projection={"items.item_id": 1})
+    return list_item_ids(doc) if doc else []
+
+
+async def apply_list(list_id: str, items: list[str]) -> bool:
+    """Bring the matrix in line with a list's current items; False if already applied.
+
+    Losing the compare-and-set means another worker applied its own read of the list, which
+    may be older than ours and its updated_at may fall out of the sync window; so re-read the
+    list and retry until the snapshot holds its latest items.
+    """
+    snapshots = get_snapshots_collection()
+    while True:
+        snapshot = await snapshots.find_one({"_id": list_id}, projection={"items": 1})
+        old = snapshot["items"] if snapshot else []
+        if old == items:
+            return False
+        change = {"id": str(uuid.uuid4()), "old": old, "new": items, "at": datetime.utcnow()}
+        if snapshot is None:
+            try:
+                await snapshots.insert_one({"_id": list_id, "items": items, "pending": [change]})
+                break
+            except DuplicateKeyError:
+                pass
+        else:
+            result = await snapshots.update_one(
+                {"_id": list_id, "items": old}, {"$set": {"items": items}, "$push": {"pending": change}}
+            )
+            if result.modified_count:
+                break
+        items = await read_list_items(list_id)
+    await finish_change(list_id, change)
+    return True
+
+
+async def remove_list(list_id: str) -> bool:
+    return await apply_list(list_id, [])
+
+
+async def finish_pending() -> int:
+    """Finish changes whose worker died between the snapshot write and the delta."""
+    snapshots = get_snapshots_collection()
+    cutoff = datetime.utcnow() - PENDING_TIMEOUT
+    finished = 0
+    async for snapshot in snapshots.find({"pending.at": {"$lt": cutoff}}, projection={"pending": 1}):
+        for change in snapshot["pending"]:
+            if change["at"] >= cutoff:
+                continue
+            # Claim it by bumping `at`, so two workers syncing at once don't both apply it.
+            claimed = await snapshots.update_one(
+                {"_id": snapshot["_id"], "pending": {"$elemMatch": {"id": change["id"], "at": change["at"]}}},
+                {"$set": {"pending.$.at": datetime.utcnow()}},
+            )
+            if claimed.modified_count:
+                await finish_change(snapshot["_id"], change)
+                finished += 1
+    return finished
+
+
+async def sync_changes() -> Optional[int]:
+    """Apply lists changed or deleted since the checkpoint. None until a backfill has run."""
+    state = get_state_collection()
+    current = await state.find_one({"_id": "sync"})
+    if current is None:
+        return None
+    started = datetime.utcnow()
+    since = current["checkpoint"] - SYNC_OVERLAP
+    applied = await finish_pending()
+    async for doc in get_lists_collection().find({"updated_at": {"$gt": since}}, projection={"items.item_id": 1}):
+        applied += await apply_list(doc["_id"], list_item_ids(doc))
+    async for doc in get_tombstones_collection().find({"deleted_at": {"$gt": since}}, projection={"list_id": 1}):
+        applied += await remove_list(doc["list_id"])
+    await state.update_one({"_id": "sync"}, {"$max": {"checkpoint": started}, "$inc": {"version": 1 if applied else 0}})
+    return applied
+
+
+async def matrix_version() -> Optional[int]:
+    state = await get_state_collection().find_one({"_id": "sync"}, projection={"version": 1})
+    return state.get("version", 0) if state else None
+
+
+def score_lists(lists: Iterable[tuple[str, set[str]]], current_items: set[str], current_list_id: Optional[str]) -> Counter:
+    """The exact score: every other list of 2+ items sharing k cart items adds 1 + k/len(list) to its other items."""
+    score: Counter[str] = Counter()
+    for list_id, items in lists:
+        if current_list_id and list_id == current_list_id:
+            continue
+        if len(items) < 2:
+            continue
+        overlap = current_items.intersection(items)
+        if not overlap:
+            continue
+        for candidate in items:
+            if candidate in current_items:
+                continue
+            # Score boost by overlap size and list size to mimic clustering proximity
+            score[candidate] += 1 + (len(overlap) / max(len(items), 1))
+    return score
+
+
+async def list_items(list_id: str) -> set[str]:
+    snapshot = await get_snapshots_collection().find_one({"_id": list_id})
+    return set(snapshot["items"]) if snapshot else set()
+
+
+def merge_rows(pairs: Iterable[dict], current_items: set[str], own_items: set[str]) -> Counter:
+    """Overlap-weighted scores from the current items' rows of the matrix.
+
+    Same shape as scanning every list: 1 per list sharing an item with the cart, plus the
+    fraction of that list made of cart items. The per-list term is approximated by the largest
+    pair count, since lists sharing several cart items can't be told apart from pair counts.
+    own_items is the cart's own list, taken back out as the scan skips it.
+    """
+    lists_with: dict[str, dict[str, int]] = {}
+    weights: Counter[str] = Counter()
+    for pair in pairs:
+        candidate = pair["other_id"]
+        if candidate in current_items:
+            continue
+        lists_with.setdefault(candidate, {})[pair["item_id"]] = pair["lists"]
+        weights[candidate] += pair["weight"]
+
+    shared = current_items & own_items
+    if len(own_items) >= 2 and shared:
+        for candidate in own_items - current_items:
+            counts = lists_with.get(candidate)
+            if counts is None:
+                continue
+            for item in shared:
+                if item in counts:
+                    counts[item] -= 1
+            weights[candidate] -= len(shared) / len(own_items)
+
+    score: Counter[str] = Counter()
+    for candidate, counts in lists_with.items():
+        lists = max(counts.values())
+        if lists > 0:
+            score[candidate] = lists + weights[candidate]
+    return score
+
+
+async def lookup_scores(current_items: set[str], current_list_id: Optional[str]) -> Counter:
+    cursor = get_pairs_collection().find(
+        {"item_id": {"$in": list(current_items)}}, projection={"_id": 0, "item_id": 1, "other_id": 1, "lists": 1, "weight": 1}
+    )
+    pairs = [pair async for pair in cursor]
+    own_items = await list_items(current_list_id) if current_list_id else set()
+    return merge_rows(pairs, current_items, own_items)
+
+
+async def rebuild() -> dict:
+    """Backfill: recompute the whole matrix from the lists collection and swap it in.
+
+    Lists that change while this runs are caught by the next sync_changes, which re-reads
+    everything updated since the rebuild started.
+    """
+    started = datetime.utcnow()
+    pairs: dict = {}
+    items_seen: set[str] = set()
+    db = get_database()
+    staged = {name: db[f"{name}_rebuild"] for name in ("item_pairs", "list_snapshots")}
+    for collection in staged.values():
+        await collection.drop()
+
+    lists = 0
+    snapshots = []
+    async for doc in get_lists_collection().find({}, projection={"items.item_id": 1}):
+        items = list_item_ids(doc)
+        add_pairs(items, 1, pairs)
+        items_seen.update(items)
+        snapshots.append({"_id": doc["_id"], "items": items})
+        lists += 1
+        if len(snapshots) >= WRITE_BATCH_SIZE:
+            await staged["list_snapshots"].insert_many(snapshots)
+            snapshots = []
+    if snapshots:
+        await staged["list_snapshots"].insert_many(snapshots)
+
+    pair_docs = [
+        {"item_id": a, "other_id": b, "lists": n, "weight": weight} for (a, b), (n, weight) in pairs.items()
+    ]
+    for start in range(0, len(pair_docs), WRITE_BATCH_SIZE):
+        await staged["item_pairs"].insert_many(pair_docs[start : start + WRITE_BATCH_SIZE])
+    for name, collection in staged.items():
+        await collection.create_indexes(INDEXES[name])
+
+    for name, collection in staged.items():
+        if await collection.estimated_document_count():
+            await collection.rename(name, dropTarget=True)
+        else:
+            await collection.drop()
+            await db[name].delete_many({})
+    await get_state_collection().update_one(
+        {"_id": "sync"}, {"$set": {"checkpoint": started}, "$inc": {"version": 1}}, upsert=True
+    )
+    return {"lists": lists, "items": len(items_seen), "pairs": len(pair_docs)}
+
+
+async def main():
+    start = time.perf_counter()
+    summary = await rebuild()
+    print(
+        f"Rebuilt co-occurrence from {summary['lists']} lists: {summary['items']} items, "
+        f"{summary['pairs']} pairs in {time.perf_counter() - start:.2f}s."
+    )
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description="Backfill the item co-occurrence matrix from every list.").parse_args()
+    asyncio.run(main())
@@ -1,20 +1,22 @@
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
+from mongo import get_client
+from pymongo import ASCENDING, IndexModel
 
 load_dotenv()
 
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 DB_NAME = os.getenv("RECOMMENDER_DB_NAME", "smart_shopping_recommender")
 LIST_DB_NAME = os.getenv("LIST_DB_NAME", "smart_shopping_lists")
 
-_client: AsyncIOMotorClient | None = None
-
-def get_client() -> AsyncIOMotorClient:
-    global _client
-    if _client is None:
-        _client = AsyncIOMotorClient(MONGO_URI)
-    return _client
+# Indexes this service relies on; ensured on startup and checked by `python indexes.py --check`.
+# The lists/list_tombstones collections belong to list_service, which declares their indexes.
+INDEXES = {
+    "list_history": [IndexModel([("user_id", ASCENDING)], background=True)],
+    "item_pairs": [
+        IndexModel([("item_id", ASCENDING), ("other_id", ASCENDING)], unique=True, background=True),
+    ],
+    "list_snapshots": [IndexModel([("pending.at", ASCENDING)], background=True)],
+}
 
 
 def get_database():
@@ -27,3 +29,24 @@ def get_history_collection():
 
 def get_lists_collection():
     return get_client()[LIST_DB_NAME]["lists"]
+
+
+def get_tombstones_collection():
+    return get_client()[LIST_DB_NAME]["list_tombstones"]
+
+
+# Co-occurrence matrix maintained by cooccurrence.py.
+def get_pairs_collection():
+    return get_database()["item_pairs"]
+
+
+def get_snapshots_collection():
+    return get_database()["list_snapshots"]
+
+
+def get_neighbors_collection():
+    return get_database()["item_neighbors"]
+
+
+def get_state_collection():
+    return get_database()["cooccurrence_state"]
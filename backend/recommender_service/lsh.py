@@ -0,0 +1,99 @@
+import hashlib
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, Optional
+
+from cooccurrence import score_lists
+
+try:
+    import numpy as np
+except ImportError:  # optional, like the sparse scorer
+    np = None
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def available() -> bool:
+    return np is not None
+
+
+def item_hash(item_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(item_id.encode(), digest_size=4).digest(), "little")
+
+
+class ListLSH:
+    """MinHash signatures over each list's item set, banded into hash buckets.
+
+    Two lists with Jaccard similarity s share at least one bucket with probability
+    1 - (1 - s**rows)**bands: more rows per band cuts false candidates, more bands raises recall.
+    """
+
+    def __init__(self, bands: int, rows: int, seed: int = 1):
+        self.bands = bands
+        self.rows = rows
+        generator = np.random.RandomState(seed)
+        permutations = bands * rows
+        self._a = generator.randint(1, _MERSENNE_PRIME, size=permutations, dtype=np.uint64)
+        self._b = generator.randint(0, _MERSENNE_PRIME, size=permutations, dtype=np.uint64)
+        self._buckets: list[dict[bytes, list[int]]] = [{} for _ in range(bands)]
+        self.list_ids: list[str] = []
+        self.list_items: list[frozenset[str]] = []
+        self.built_at = datetime.utcnow()
+        self.build_seconds = 0.0
+
+    def signature(self, items: Iterable[str]):
+        hashes = np.fromiter((item_hash(item) for item in items), dtype=np.uint64)
+        # Universal hashing with uint64 wraparound; the same scheme as datasketch's MinHash.
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=1)
+
+    def _band_keys(self, signature) -> list[bytes]:
+        return [signature[band * self.rows : (band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def add(self, list_id: str, items: frozenset[str]):
+        row = len(self.list_ids)
+        self.list_ids.append(list_id)
+        self.list_items.append(items)
+        for band, key in enumerate(self._band_keys(self.signature(items))):
+            self._buckets[band].setdefault(key, []).append(row)
+
+    @classmethod
+    def build(cls, lists: Iterable[tuple[str, list[str]]], bands: int, rows: int) -> "ListLSH":
+        """Lists under 2 items never score, so they are left out of the index."""
+        start = time.perf_counter()
+        index = cls(bands, rows)
+        for list_id, items in lists:
+            if len(items) >= 2:
+                index.add(list_id, frozenset(items))
+        index.build_seconds = time.perf_counter() - start
+        return index
+
+    def similar_lists(self, items: set[str], limit: int) -> list[int]:
+        """Rows of up to `limit` indexed lists most similar to items, by exact Jaccard among bucket-mates."""
+        if not items:
+            return []
+        candidates: set[int] = set()
+        for band, key in enumerate(self._band_keys(self.signature(items))):
+            candidates.update(self._buckets[band].get(key, ()))
+        ranked = sorted(
+            candidates, key=lambda row: -len(items & self.list_items[row]) / len(items | self.list_items[row])
+        )
+        return ranked[:limit]
+
+    def scores(self, current_items: set[str], current_list_id: Optional[str], limit: int) -> Counter:
+        """The exact overlap-weighted score, restricted to the most similar lists."""
+        rows = self.similar_lists(current_items, limit)
+        return score_lists(((self.list_ids[row], self.list_items[row]) for row in rows), current_items, current_list_id)
+
+    def stats(self) -> dict:
+        return {
+            "bands": self.bands,
+            "rows": self.rows,
+            "lists": len(self.list_ids),
+            "buckets": sum(len(buckets) for buckets in self._buckets),
+            "built_at": self.built_at,
+            "build_seconds": self.build_seconds,
+            "age_seconds": (datetime.utcnow() - self.built_at).total_seconds(),
+        }
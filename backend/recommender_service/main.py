@@ -1,18 +1,59 @@
+import asyncio
+import json
+import os
 import time
 from collections import Counter
 from typing import List as ListType
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 
+import lsh
+import scoring
+from cooccurrence import list_item_ids, list_items, lookup_scores, matrix_version, score_lists, sync_changes
 from database import get_history_collection, get_lists_collection
+from neighbors import NeighborTable, build_table, load_table, save_table
+from indexes import provision_indexes
+from mongo import close_client, pool_stats, warm_up
 from metrics import send_metric
-from schemas import RecommendationItem, RecommendationRequest, RecommendationResponse
+from schemas import (
+    RecommendationBatchRequest,
+    RecommendationBatchResponse,
+    RecommendationItem,
+    RecommendationRequest,
+    RecommendationResponse,
+)
+from ttl_cache import TTLCache
 
 load_dotenv()
 
 SERVICE_NAME = "recommender_service"
+# How often list changes are folded into the co-occurrence matrix; 0 disables the sync loop.
+COOCCURRENCE_SYNC_SECONDS = int(os.getenv("COOCCURRENCE_SYNC_SECONDS", "30"))
+# Rebuild interval of the in-memory sparse scoring matrix (needs numpy/scipy); 0 builds once.
+# Unless RECOMMENDER_SCORING=sparse it is only built, and kept refreshed, while something uses it.
+SCORING_MATRIX_REFRESH_SECONDS = int(os.getenv("SCORING_MATRIX_REFRESH_SECONDS", "300"))
+# Precomputed top-K neighbors per item, rebuilt from the co-occurrence matrix every
+# NEIGHBOR_REFRESH_SECONDS (0 builds once) and, if NEIGHBOR_TABLE_PERSIST, saved for warm starts.
+NEIGHBOR_K = int(os.getenv("NEIGHBOR_K", "50"))
+NEIGHBOR_REFRESH_SECONDS = int(os.getenv("NEIGHBOR_REFRESH_SECONDS", "600"))
+NEIGHBOR_TABLE_PERSIST = os.getenv("NEIGHBOR_TABLE_PERSIST", "false").lower() in ("1", "true", "yes")
+# Preferred scorer: lsh | neighbors | sparse | pairs | scan. Falls through to the next one that is built.
+RECOMMENDER_SCORING = os.getenv("RECOMMENDER_SCORING", "neighbors")
+SCORING_MODES = ["lsh", "neighbors", "sparse", "pairs", "scan"]
+# MinHash LSH over list contents (RECOMMENDER_SCORING=lsh, needs numpy): bands x rows hash functions,
+# scoring the LSH_MAX_LISTS most similar lists. Tune with benchmark_lsh.py.
+LSH_BANDS = int(os.getenv("LSH_BANDS", "32"))
+LSH_ROWS = int(os.getenv("LSH_ROWS", "1"))
+LSH_MAX_LISTS = int(os.getenv("LSH_MAX_LISTS", "500"))
+LSH_REFRESH_SECONDS = int(os.getenv("LSH_REFRESH_SECONDS", "600"))
+RECOMMENDATION_LIMIT = 10
+# Results per (cart, user, list); entries are also dropped whenever a model changes, so the TTL
+# mostly bounds how long list_history changes (and list edits, when scanning) go unseen.
+RECOMMENDATION_CACHE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "10000"))
+RECOMMENDATION_CACHE_TTL_SECONDS = float(os.getenv("RECOMMENDATION_CACHE_TTL_SECONDS", "60"))
+HISTORY_BOOST = 0.5
 app = FastAPI(title="Smart Shopping List - Recommendation Service")
 
 app.add_middleware(
@@ -32,11 +73,226 @@ async def record_metrics(request: Request, call_next):
     return response
 
 
+@app.on_event("startup")
+async def start_index_provisioning():
+    # Runs in the background so a slow index build or unreachable Mongo doesn't block startup.
+    app.state.index_task = asyncio.create_task(provision_indexes(SERVICE_NAME))
+
+
+@app.on_event("startup")
+async def start_mongo_pool():
+    app.state.mongo_warm_up_task = asyncio.create_task(warm_up(SERVICE_NAME))
+
+
+@app.on_event("shutdown")
+async def close_mongo_pool():
+    close_client()
+
+
+recommendation_cache = TTLCache(RECOMMENDATION_CACHE_SIZE, RECOMMENDATION_CACHE_TTL_SECONDS)
+# Identical requests already being computed; later arrivals await the same task.
+pending_recommendations: dict[str, asyncio.Task] = {}
+coalesced_requests = 0
+# Part of every cache key; bumped whenever any scoring model is rebuilt or the matrix changes.
+model_version = 0
+
+
+def model_changed():
+    global model_version
+    model_version += 1
+    recommendation_cache.clear()
+
+
+# False until a backfill (`python cooccurrence.py`) has built the matrix; scoring scans lists until then.
+matrix_ready = False
+
+
+async def sync_cooccurrence():
+    global matrix_ready
+    warned = False
+    seen_version = None
+    while True:
+        try:
+            applied = await sync_changes()
+            matrix_ready = applied is not None
+            # The version also moves when another worker applied the change or a backfill ran.
+            version = await matrix_version()
+            if version != seen_version:
+                seen_version = version
+                model_changed()
+            if applied is None and not warned:
+                print(f"[{SERVICE_NAME}] co-occurrence matrix not built; run `python cooccurrence.py` to backfill")
+                warned = True
+        except Exception as exc:
+            print(f"[{SERVICE_NAME}] co-occurrence sync failed: {exc}")
+        if COOCCURRENCE_SYNC_SECONDS <= 0:
+            return
+        await asyncio.sleep(COOCCURRENCE_SYNC_SECONDS)
+
+
+@app.on_event("startup")
+async def start_cooccurrence_sync():
+    app.state.cooccurrence_task = asyncio.create_task(sync_cooccurrence())
+
+
+@app.on_event("shutdown")
+async def stop_cooccurrence_sync():
+    app.state.cooccurrence_task.cancel()
+
+
+# Set once the first build finishes; requests fall back to cooccurrence_scores until then.
+scorer: "scoring.SparseScorer | None" = None
+# Set by requests that would use the scorer: batches, and single requests it serves or that are
+# left scanning lists because no cheaper model is built.
+scorer_wanted = asyncio.Event()
+
+
+async def rebuild_scorer():
+    global scorer
+    lists = [(doc["_id"], list_item_ids(doc)) async for doc in get_lists_collection().find({}, projection={"items.item_id": 1})]
+    scorer = await asyncio.to_thread(scoring.SparseScorer.build, lists)
+    model_changed()
+
+
+async def refresh_scorer():
+    global scorer
+    while True:
+        if RECOMMENDER_SCORING != "sparse":
+            if scorer is not None and not scorer_wanted.is_set():
+                # Unused since the last build: free it rather than rebuild it.
+                scorer = None
+            await scorer_wanted.wait()
+        scorer_wanted.clear()
+        try:
+            await rebuild_scorer()
+        except Exception as exc:
+            # Keep serving from the previous matrix (or the pair matrix while cold).
+            print(f"[{SERVICE_NAME}] scoring matrix build failed: {exc}")
+        if SCORING_MATRIX_REFRESH_SECONDS <= 0:
+            return
+        await asyncio.sleep(SCORING_MATRIX_REFRESH_SECONDS)
+
+
+@app.on_event("startup")
+async def start_scorer():
+    if not scoring.available():
+        print(f"[{SERVICE_NAME}] numpy/scipy not installed; scoring from the co-occurrence matrix")
+        return
+    app.state.scorer_task = asyncio.create_task(refresh_scorer())
+
+
+@app.on_event("shutdown")
+async def stop_scorer():
+    task = getattr(app.state, "scorer_task", None)
+    if task:
+        task.cancel()
+
+
+neighbor_table: NeighborTable | None = None
+neighbor_build_lock = asyncio.Lock()
+
+
+async def rebuild_neighbor_table() -> NeighborTable | None:
+    global neighbor_table
+    async with neighbor_build_lock:
+        table = await build_table(NEIGHBOR_K)
+        if table is None:
+            return None
+        neighbor_table = table
+        model_changed()
+        if NEIGHBOR_TABLE_PERSIST:
+            await save_table(table)
+        return table
+
+
+async def refresh_neighbor_table():
+    global neighbor_table
+    if NEIGHBOR_TABLE_PERSIST:
+        try:
+            neighbor_table = await load_table()
+            model_changed()
+        except Exception as exc:
+            print(f"[{SERVICE_NAME}] loading saved neighbor table failed: {exc}")
+    while True:
+        try:
+            await rebuild_neighbor_table()
+        except Exception as exc:
+            print(f"[{SERVICE_NAME}] neighbor table build failed: {exc}")
+        if NEIGHBOR_REFRESH_SECONDS <= 0:
+            return
+        await asyncio.sleep(NEIGHBOR_REFRESH_SECONDS)
+
+
+@app.on_event("startup")
+async def start_neighbor_table():
+    app.state.neighbor_task = asyncio.create_task(refresh_neighbor_table())
+
+
+@app.on_event("shutdown")
+async def stop_neighbor_table():
+    app.state.neighbor_task.cancel()
+
+
+list_index: lsh.ListLSH | None = None
+
+
+async def refresh_list_index():
+    global list_index
+    while True:
+        try:
+            lists = [(doc["_id"], list_item_ids(doc)) async for doc in get_lists_collection().find({}, projection={"items.item_id": 1})]
+            list_index = await asyncio.to_thread(lsh.ListLSH.build, lists, LSH_BANDS, LSH_ROWS)
+            model_changed()
+        except Exception as exc:
+            print(f"[{SERVICE_NAME}] LSH index build failed: {exc}")
+        if LSH_REFRESH_SECONDS <= 0:
+            return
+        await asyncio.sleep(LSH_REFRESH_SECONDS)
+
+
+@app.on_event("startup")
+async def start_list_index():
+    # Only built when asked for; it holds every list's items in memory.
+    if RECOMMENDER_SCORING != "lsh":
+        return
+    if not lsh.available():
+        print(f"[{SERVICE_NAME}] numpy not installed; RECOMMENDER_SCORING=lsh falls back")
+        return
+    app.state.list_index_task = asyncio.create_task(refresh_list_index())
+
+
+@app.on_event("shutdown")
+async def stop_list_index():
+    task = getattr(app.state, "list_index_task", None)
+    if task:
+        task.cancel()
+
+
+def preferred_mode() -> int:
+    return SCORING_MODES.index(RECOMMENDER_SCORING) if RECOMMENDER_SCORING in SCORING_MODES else 0
+
+
+def scoring_mode() -> str:
+    ready = {
+        "lsh": list_index is not None,
+        "neighbors": neighbor_table is not None,
+        "sparse": scorer is not None,
+        "pairs": matrix_ready,
+        "scan": True,
+    }
+    return next(mode for mode in SCORING_MODES[preferred_mode() :] if ready[mode])
+
+
 @app.get("/health")
 async def health():
     return {"service": SERVICE_NAME, "status": "ok"}
 
 
+@app.get("/health/pool")
+async def health_pool():
+    return {"service": SERVICE_NAME, **pool_stats.snapshot()}
+
+
 async def fetch_user_history(user_id: str):
     collection = get_history_collection()
     cursor = collection.find({"user_id": user_id})
@@ -46,62 +302,140 @@ async def fetch_user_history(user_id: str):
     return history
 
 
-async def cooccurrence_scores(current_items: set[str], current_list_id: str | None):
+async def cooccurrence_scores(current_items: set[str], current_list_id: str | None, mode: str):
+    if mode == "lsh":
+        return list_index.scores(current_items, current_list_id, LSH_MAX_LISTS)
+    if mode == "neighbors":
+        own_items = await list_items(current_list_id) if current_list_id else set()
+        return neighbor_table.scores(current_items, own_items)
+    if mode == "pairs":
+        return await lookup_scores(current_items, current_list_id)
+    return await scan_cooccurrence_scores(current_items, current_list_id)
+
+
+async def scan_cooccurrence_scores(current_items: set[str], current_list_id: str | None):
     """Compute similarity scores based on co-occurrence across lists (simple clustering heuristic)."""
     collection = get_lists_collection()
-    cursor = collection.find({})
-    score: Counter[str] = Counter()
-    async for doc in cursor:
-        if current_list_id and doc.get("_id") == current_list_id:
-            continue
-        items = {item.get("item_id") for item in doc.get("items", []) if item.get("item_id")}
-        if len(items) < 2:
-            continue
-        overlap = current_items.intersection(items)
-        if not overlap:
-            continue
-        for candidate in items:
-            if candidate in current_items:
-                continue
-            # Score boost by overlap size and list size to mimic clustering proximity
-            score[candidate] += 1 + (len(overlap) / max(len(items), 1))
-    return score
+    # Lists sharing no item with the cart contribute nothing; let the items.item_id index skip them.
+    cursor = collection.find({"items.item_id": {"$in": list(current_items)}}, projection={"items.item_id": 1})
+    lists = [(doc["_id"], set(list_item_ids(doc))) async for doc in cursor]
+    return score_lists(lists, current_items, current_list_id)
+
+
+def history_boosts(history, current_set: set[str]) -> Counter:
+    """Blend in user history to break ties / enrich scoring."""
+    boosts: Counter[str] = Counter()
+    for record in history:
+        boosts.update(item for item in record.get("items", []) if item not in current_set)
+    for item in boosts:
+        boosts[item] *= HISTORY_BOOST
+    return boosts
+
+
+def to_response(ranked) -> RecommendationResponse:
+    reason = "Often bought with your current items"
+    return RecommendationResponse(
+        recommendations=[RecommendationItem(item_id=item_id, score=float(freq), reason=reason) for item_id, freq in ranked]
+    )
+
+
+async def rank_batch(payloads: ListType[RecommendationRequest], batch: bool = False) -> ListType[RecommendationResponse]:
+    carts = [set(payload.current_items or []) for payload in payloads]
+    scored = [index for index, cart in enumerate(carts) if len(cart) >= 2]
+    histories = await asyncio.gather(*(fetch_user_history(payloads[index].user_id) for index in scored))
+    boosts = [history_boosts(history, carts[index]) for index, history in zip(scored, histories)]
+
+    ranked: dict[int, list] = {}
+    mode = scoring_mode()
+    if batch or (mode in ("sparse", "scan") and preferred_mode() <= SCORING_MODES.index("sparse")):
+        scorer_wanted.set()
+    if scorer is not None and (batch or mode == "sparse"):
+        # One sparse product scores every cart in the batch.
+        results = scorer.recommend(
+            [carts[index] for index in scored], [payloads[index].list_id for index in scored], boosts, RECOMMENDATION_LIMIT
+        )
+        ranked = dict(zip(scored, results))
+    else:
+        for index, extra in zip(scored, boosts):
+            recs_counter = await cooccurrence_scores(carts[index], payloads[index].list_id, mode)
+            recs_counter.update(extra)
+            ranked[index] = recs_counter.most_common(RECOMMENDATION_LIMIT)
+    return [to_response(ranked.get(index, [])) for index in range(len(payloads))]
+
+
+def recommendation_key(payload: RecommendationRequest) -> str:
+    cart = sorted(set(payload.current_items or []))
+    return f"{model_version}:" + json.dumps([cart, payload.user_id, payload.list_id])
+
+
+async def compute_recommendation(key: str, payload: RecommendationRequest) -> RecommendationResponse:
+    try:
+        response = (await rank_batch([payload]))[0]
+        recommendation_cache.set(key, response)
+        return response
+    finally:
+        pending_recommendations.pop(key, None)
 
 
 @app.post("/recommendations", response_model=RecommendationResponse)
 async def recommend(payload: RecommendationRequest):
-    current_set = set(payload.current_items or [])
-    if len(current_set) < 2:
-        return RecommendationResponse(recommendations=[])
+    global coalesced_requests
+    key = recommendation_key(payload)
+    cached = recommendation_cache.get(key)
+    if cached is not None:
+        return cached
+    task = pending_recommendations.get(key)
+    if task is None:
+        task = asyncio.create_task(compute_recommendation(key, payload))
+        pending_recommendations[key] = task
+    else:
+        coalesced_requests += 1
+    # Shielded so one caller disconnecting doesn't cancel the others' shared computation.
+    return await asyncio.shield(task)
 
-    recs_counter = await cooccurrence_scores(current_set, payload.list_id)
 
-    # Blend in user history to break ties / enrich scoring
-    history = await fetch_user_history(payload.user_id)
-    for record in history:
-        for item in record.get("items", []):
-            if item in current_set:
-                continue
-            recs_counter[item] += 0.5
-
-    recommendations: ListType[RecommendationItem] = []
-    for item_id, freq in recs_counter.most_common(10):
-        if item_id in current_set:
-            continue
-        reason = "Often bought with your current items"
-        recommendations.append(
-            RecommendationItem(
-                item_id=item_id,
-                score=float(freq),
-                reason=reason,
-            )
-        )
+@app.get("/recommendations/cache/stats")
+async def recommendation_cache_stats():
+    return {
+        **recommendation_cache.stats(),
+        "model_version": model_version,
+        "in_flight": len(pending_recommendations),
+        "coalesced": coalesced_requests,
+    }
+
+
+@app.post("/recommendations/batch", response_model=RecommendationBatchResponse)
+async def recommend_batch(payload: RecommendationBatchRequest):
+    return RecommendationBatchResponse(results=await rank_batch(payload.requests, batch=True))
+
+
+@app.get("/recommendations/model")
+async def model_status():
+    return {
+        "scoring": scoring_mode(),
+        "lsh": list_index.stats() if list_index else None,
+        "neighbors": neighbor_table.stats() if neighbor_table else None,
+        "sparse": scorer.stats() if scorer else None,
+        "pairs": {"ready": matrix_ready},
+    }
+
 
-    return RecommendationResponse(recommendations=recommendations)
+@app.post("/recommendations/model/refresh")
+async def refresh_model():
+    """Rebuild the neighbor table now instead of waiting for NEIGHBOR_REFRESH_SECONDS."""
+    table = await rebuild_neighbor_table()
+    if table is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Co-occurrence matrix not built yet")
+    return table.stats()
 
 
 # Developer notes:
 # - This service currently reads historical list data from the list_history collection.
-#   A background job could mirror data from the List Service or stream events here.
+# - Co-occurrence is served from the matrix in cooccurrence.py, kept current from lists.updated_at
+#   and list_tombstones by the sync loop; `python cooccurrence.py` rebuilds it from scratch.
+# - With numpy/scipy installed, batches (and single requests with RECOMMENDER_SCORING=sparse, or
+#   before any matrix exists) score on scoring.SparseScorer, rebuilt from the lists every
+#   SCORING_MATRIX_REFRESH_SECONDS while in use, so it can lag list edits by that long.
+# - By default recommend() merges precomputed top-K neighbor rows (neighbors.py); see RECOMMENDER_SCORING.
 # - Real ML model training/inference can be plugged into recommend() replacing the frequency heuristic.
 # - Mongo connection configured via MONGO_URI/DB_NAME env vars; metrics sent when STATS_SERVICE_URL is set.
@@ -0,0 +1,94 @@
+import heapq
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+from cooccurrence import WRITE_BATCH_SIZE, merge_rows
+from database import get_database, get_neighbors_collection, get_pairs_collection, get_state_collection
+
+
+def pair_score(pair: dict) -> float:
+    """A neighbor's rank: what it would score against a one-item cart."""
+    return pair["lists"] + pair["weight"]
+
+
+class NeighborTable:
+    """Each item's top-K co-occurrence pairs, precomputed from the item_pairs matrix.
+
+    Built whole and swapped in by reassignment, so readers never see a half-built table.
+    """
+
+    def __init__(self, rows: dict[str, list[dict]], k: int, checkpoint: Optional[datetime], built_at: datetime, build_seconds: float):
+        self.rows = rows
+        self.k = k
+        # Matrix checkpoint the table was built from: lists changed after it are not reflected.
+        self.checkpoint = checkpoint
+        self.built_at = built_at
+        self.build_seconds = build_seconds
+
+    def scores(self, current_items: set[str], own_items: set[str]) -> Counter:
+        pairs = (pair for item in current_items for pair in self.rows.get(item, ()))
+        return merge_rows(pairs, current_items, own_items)
+
+    def stats(self) -> dict:
+        return {
+            "k": self.k,
+            "items": len(self.rows),
+            "neighbors": sum(len(row) for row in self.rows.values()),
+            "built_at": self.built_at,
+            "build_seconds": self.build_seconds,
+            "age_seconds": (datetime.utcnow() - self.built_at).total_seconds(),
+            "checkpoint": self.checkpoint,
+        }
+
+
+async def build_table(k: int) -> Optional[NeighborTable]:
+    """Stream the pair matrix in item order, keeping the K best pairs per item. None if not built yet."""
+    state = await get_state_collection().find_one({"_id": "sync"})
+    if state is None:
+        return None
+    start = time.perf_counter()
+    built_at = datetime.utcnow()
+    rows: dict[str, list[dict]] = {}
+    current: Optional[str] = None
+    row: list[dict] = []
+    cursor = get_pairs_collection().find(
+        {"lists": {"$gt": 0}}, projection={"_id": 0, "item_id": 1, "other_id": 1, "lists": 1, "weight": 1}
+    ).sort([("item_id", 1), ("other_id", 1)])
+    async for pair in cursor:
+        if pair["item_id"] != current:
+            if row:
+                rows[current] = heapq.nlargest(k, row, key=pair_score)
+            current, row = pair["item_id"], []
+        row.append(pair)
+    if row:
+        rows[current] = heapq.nlargest(k, row, key=pair_score)
+    return NeighborTable(rows, k, state["checkpoint"], built_at, time.perf_counter() - start)
+
+
+async def save_table(table: NeighborTable):
+    """Persist into item_neighbors (staged, then renamed over the old table) for warm starts."""
+    db = get_database()
+    staged = db["item_neighbors_rebuild"]
+    await staged.drop()
+    docs = [{"_id": item, "neighbors": row} for item, row in table.rows.items()]
+    for start in range(0, len(docs), WRITE_BATCH_SIZE):
+        await staged.insert_many(docs[start : start + WRITE_BATCH_SIZE])
+    if docs:
+        await staged.rename("item_neighbors", dropTarget=True)
+    else:
+        await get_neighbors_collection().delete_many({})
+    await get_state_collection().update_one(
+        {"_id": "neighbors"},
+        {"$set": {"k": table.k, "checkpoint": table.checkpoint, "built_at": table.built_at, "build_seconds": table.build_seconds}},
+        upsert=True,
+    )
+
+
+async def load_table() -> Optional[NeighborTable]:
+    meta = await get_state_collection().find_one({"_id": "neighbors"})
+    if meta is None:
+        return None
+    rows = {doc["_id"]: doc["neighbors"] async for doc in get_neighbors_collection().find({})}
+    return NeighborTable(rows, meta["k"], meta.get("checkpoint"), meta["built_at"], meta["build_seconds"])
@@ -1,5 +1,5 @@
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class RecommendationRequest(BaseModel):
@@ -16,3 +16,11 @@ class RecommendationItem(BaseModel):
 
 class RecommendationResponse(BaseModel):
     recommendations: List[RecommendationItem]
+
+
+class RecommendationBatchRequest(BaseModel):
+    requests: List[RecommendationRequest] = Field(min_length=1, max_length=100)
+
+
+class RecommendationBatchResponse(BaseModel):
+    results: List[RecommendationResponse]
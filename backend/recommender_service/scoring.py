@@ -0,0 +1,116 @@
+import time
+from datetime import datetime
+from typing import Iterable, Optional
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # optional: without them scoring stays on the Mongo pair matrix
+    np = None
+    sparse = None
+
+
+def available() -> bool:
+    return sparse is not None
+
+
+class SparseScorer:
+    """List x item incidence matrix (CSR) with an item-id <-> column vocabulary.
+
+    Scores match the list scan exactly: every other list of 2+ items sharing k of the cart's
+    items adds 1 + k/len(list) to each of its items outside the cart.
+    """
+
+    def __init__(self, list_ids: list[str], item_ids: list[str], matrix):
+        self.list_ids = list_ids
+        self.item_ids = item_ids
+        self.matrix = matrix
+        self.matrix_t = matrix.T.tocsr()
+        self.list_index = {list_id: row for row, list_id in enumerate(list_ids)}
+        self.item_index = {item_id: col for col, item_id in enumerate(item_ids)}
+        self.list_sizes = np.diff(matrix.indptr).astype(np.float64)
+        self.built_at = datetime.utcnow()
+        self.build_seconds = 0.0
+
+    @classmethod
+    def build(cls, lists: Iterable[tuple[str, list[str]]]) -> "SparseScorer":
+        """lists yields (list_id, distinct item ids); lists under 2 items never score, so they are dropped."""
+        start = time.perf_counter()
+        list_ids: list[str] = []
+        item_index: dict[str, int] = {}
+        indptr = [0]
+        indices: list[int] = []
+        for list_id, items in lists:
+            if len(items) < 2:
+                continue
+            list_ids.append(list_id)
+            indices.extend(item_index.setdefault(item, len(item_index)) for item in items)
+            indptr.append(len(indices))
+        matrix = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.float64), np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+            shape=(len(list_ids), len(item_index)),
+        )
+        scorer = cls(list_ids, list(item_index), matrix)
+        scorer.build_seconds = time.perf_counter() - start
+        return scorer
+
+    def stats(self) -> dict:
+        return {
+            "lists": len(self.list_ids),
+            "items": len(self.item_ids),
+            "entries": int(self.matrix.nnz),
+            "built_at": self.built_at,
+            "build_seconds": self.build_seconds,
+            "age_seconds": (datetime.utcnow() - self.built_at).total_seconds(),
+        }
+
+    def _column_matrix(self, per_cart: list[dict[str, float]]):
+        """items x carts CSC from one {item_id: value} per cart; unknown items are skipped."""
+        rows, cols, values = [], [], []
+        for col, entries in enumerate(per_cart):
+            for item, value in entries.items():
+                row = self.item_index.get(item)
+                if row is not None:
+                    rows.append(row)
+                    cols.append(col)
+                    values.append(value)
+        return sparse.csc_matrix((values, (rows, cols)), shape=(len(self.item_ids), len(per_cart)))
+
+    def score_batch(self, carts: list[set[str]], list_ids: list[Optional[str]], boosts: Optional[list[dict[str, float]]] = None):
+        """Scores for many carts at once as an items x carts CSC matrix, cart items excluded."""
+        in_cart = self._column_matrix([dict.fromkeys(cart, 1.0) for cart in carts])
+        # overlap[l, r]: how many of cart r's items list l holds.
+        overlap = (self.matrix @ in_cart).tocoo()
+        own_rows = np.array([self.list_index.get(list_id, -1) if list_id else -1 for list_id in list_ids], dtype=np.int64)
+        keep = overlap.row != own_rows[overlap.col]
+        rows, cols = overlap.row[keep], overlap.col[keep]
+        weights = sparse.csr_matrix((1 + overlap.data[keep] / self.list_sizes[rows], (rows, cols)), shape=overlap.shape)
+        scores = self.matrix_t @ weights
+        if boosts is not None:
+            scores = scores + self._column_matrix(boosts)
+        scores = (scores - scores.multiply(in_cart)).tocsc()
+        scores.eliminate_zeros()
+        return scores
+
+    def recommend(
+        self,
+        carts: list[set[str]],
+        list_ids: list[Optional[str]],
+        boosts: list[dict[str, float]],
+        limit: int,
+    ) -> list[list[tuple[str, float]]]:
+        """Top `limit` (item_id, score) per cart, with per-cart boosts (e.g. history) added on top."""
+        scores = self.score_batch(carts, list_ids, boosts)
+        results = []
+        for col, (cart, extra) in enumerate(zip(carts, boosts)):
+            start, end = scores.indptr[col], scores.indptr[col + 1]
+            candidates, values = scores.indices[start:end], scores.data[start:end]
+            if len(values) > limit:
+                top = np.argpartition(-values, limit)[:limit]
+                candidates, values = candidates[top], values[top]
+            ranked = [(self.item_ids[index], float(value)) for index, value in zip(candidates, values)]
+            # Boosted items the matrix has never seen can't be indexed; rank them alongside.
+            ranked += [(item, boost) for item, boost in extra.items() if item not in self.item_index and item not in cart]
+            ranked.sort(key=lambda pair: -pair[1])
+            results.append(ranked[:limit])
+        return results
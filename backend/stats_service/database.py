@@ -1,19 +1,22 @@
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
+from mongo import get_client
+from pymongo import ASCENDING, DESCENDING, IndexModel
 
 load_dotenv()
 
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 DB_NAME = os.getenv("STATS_DB_NAME", "smart_shopping_stats")
 
-_client: AsyncIOMotorClient | None = None
-
-def get_client() -> AsyncIOMotorClient:
-    global _client
-    if _client is None:
-        _client = AsyncIOMotorClient(MONGO_URI)
-    return _client
+# Indexes this service relies on; ensured on startup and checked by `python indexes.py --check`.
+INDEXES = {
+    "metrics": [
+        IndexModel(
+            [("service_name", ASCENDING), ("endpoint", ASCENDING), ("method", ASCENDING), ("timestamp", DESCENDING)],
+            background=True,
+        ),
+        IndexModel([("timestamp", DESCENDING)], background=True),
+    ],
+}
 
 
 def get_database():
@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+import sys
+
+from pymongo import IndexModel
+
+from database import INDEXES, get_database
+
+
+def _key(spec) -> tuple:
+    return tuple((field, direction) for field, direction in spec)
+
+
+def _options(index: dict) -> tuple:
+    partial = index.get("partialFilterExpression")
+    return bool(index.get("unique")), dict(partial) if partial else None
+
+
+async def missing_indexes() -> dict[str, list[IndexModel]]:
+    """Declared indexes (database.INDEXES) whose key pattern and options do not exist yet, per collection."""
+    db = get_database()
+    missing: dict[str, list[IndexModel]] = {}
+    for collection_name, models in INDEXES.items():
+        info = await db[collection_name].index_information()
+        existing = [(_key(index["key"]), _options(index)) for index in info.values()]
+        absent = [
+            model for model in models if (_key(model.document["key"].items()), _options(model.document)) not in existing
+        ]
+        if absent:
+            missing[collection_name] = absent
+    return missing
+
+
+async def ensure_indexes() -> dict[str, list[str]]:
+    """Create missing declared indexes; safe to call on every startup. Returns created names.
+
+    An index whose options change (e.g. made unique) must be declared under a new name: it is
+    built next to the old one, which is dropped only once the build succeeded, so a failure
+    (say, duplicates under a new unique index) leaves the old index serving queries.
+    """
+    db = get_database()
+    created: dict[str, list[str]] = {}
+    for collection_name, models in (await missing_indexes()).items():
+        collection = db[collection_name]
+        names = await collection.create_indexes(models)
+        created[collection_name] = names
+        declared = [(_key(model.document["key"].items()), _options(model.document)) for model in INDEXES[collection_name]]
+        replaced = {_key(model.document["key"].items()) for model in models}
+        for name, index in (await collection.index_information()).items():
+            key = _key(index["key"])
+            if name not in names and key in replaced and (key, _options(index)) not in declared:
+                await collection.drop_index(name)
+    return created
+
+
+async def provision_indexes(service_name: str):
+    """Startup hook body: ensure indexes without failing the service if Mongo is unavailable."""
+    try:
+        created = await ensure_indexes()
+    except Exception as exc:
+        print(f"[{service_name}] index provisioning failed: {exc}")
+        return
+    for collection_name, names in created.items():
+        print(f"[{service_name}] created indexes on {collection_name}: {', '.join(names)}")
+
+
+async def main(check: bool) -> int:
+    if check:
+        missing = await missing_indexes()
+        for collection_name, models in missing.items():
+            for model in models:
+                print(f"missing: {collection_name} {model.document['name']}")
+        return 1 if missing else 0
+    created = await ensure_indexes()
+    for collection_name, names in created.items():
+        print(f"created: {collection_name} {', '.join(names)}")
+    if not created:
+        print("All declared indexes present.")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check or create this service's declared Mongo indexes.")
+    parser.add_argument("--check", action="store_true", help="only report missing indexes; exit 1 if any")
+    sys.exit(asyncio.run(main(parser.parse_args().check)))
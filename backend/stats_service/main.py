@@ -1,3 +1,4 @@
+import asyncio
 import time
 from typing import List as ListType
 
@@ -6,6 +7,8 @@ from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from database import get_metrics_collection
+from indexes import provision_indexes
+from mongo import close_client, pool_stats, warm_up
 from schemas import MetricCreate, MetricSummary, MethodSummary
 
 load_dotenv()
@@ -30,11 +33,32 @@ async def record_metrics(request: Request, call_next):
     return response
 
 
+@app.on_event("startup")
+async def start_index_provisioning():
+    # Runs in the background so a slow index build or unreachable Mongo doesn't block startup.
+    app.state.index_task = asyncio.create_task(provision_indexes(SERVICE_NAME))
+
+
+@app.on_event("startup")
+async def start_mongo_pool():
+    app.state.mongo_warm_up_task = asyncio.create_task(warm_up(SERVICE_NAME))
+
+
+@app.on_event("shutdown")
+async def close_mongo_pool():
+    close_client()
+
+
 @app.get("/health")
 async def health():
     return {"service": SERVICE_NAME, "status": "ok"}
 
 
+@app.get("/health/pool")
+async def health_pool():
+    return {"service": SERVICE_NAME, **pool_stats.snapshot()}
+
+
 @app.post("/metrics", status_code=201)
 async def ingest_metric(payload: MetricCreate):
     collection = get_metrics_collection()
@@ -1,4 +1,8 @@
+import hashlib
 import os
+import secrets
+import time
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -7,7 +11,9 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
-from database import get_user_collection
+from database import get_refresh_tokens_collection, get_user_collection
+from hash_pool import BoundedExecutor, PoolBusy
+from ttl_cache import TTLCache
 
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -15,6 +21,39 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 JWT_SECRET = os.getenv("JWT_SECRET", "change-me")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 JWT_EXPIRES_MIN = int(os.getenv("JWT_EXPIRES_MIN", "60"))
+REFRESH_TOKEN_EXPIRES_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRES_DAYS", "30"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "300"))
+# Kept short: this bounds how long a profile or admin change goes unnoticed by other workers.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+# Hashes allowed to wait for a worker; beyond this register/login answer 503 rather than pile up.
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "32"))
+
+# Verified claims by token hash (entries never outlive the token's exp) and user profiles by id,
+# so repeat requests skip the signature check and the users lookup.
+token_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL_SECONDS)
+user_cache = TTLCache(AUTH_CACHE_SIZE, USER_CACHE_TTL_SECONDS)
+
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def invalidate_token(token: str):
+    token_cache.invalidate(token_key(token))
+
+
+def invalidate_user(user_id: str):
+    """Call after any write to a user document so this process stops serving the old profile."""
+    user_cache.invalidate(user_id)
+
+
+def auth_cache_stats() -> dict:
+    return {"tokens": token_cache.stats(), "users": user_cache.stats()}
+
+
+password_pool = BoundedExecutor(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_SIZE)
 
 
 def get_password_hash(password: str) -> str:
@@ -25,6 +64,26 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def run_password_task(fn, *args):
+    """Run a hash/verify on password_pool, shedding load with 503 when its queue is full."""
+    try:
+        return await password_pool.run(fn, *args)
+    except PoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent sign-ins, retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+
+async def hash_password(password: str) -> str:
+    return await run_password_task(get_password_hash, password)
+
+
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    return await run_password_task(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=JWT_EXPIRES_MIN))
@@ -32,25 +91,84 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 
+async def create_refresh_token(user_id: str, family_id: Optional[str] = None) -> str:
+    """Issue an opaque refresh token; only its hash is stored. A family is one login's rotation chain."""
+    token = secrets.token_urlsafe(32)
+    now = datetime.utcnow()
+    await get_refresh_tokens_collection().insert_one(
+        {
+            "_id": token_key(token),
+            "user_id": user_id,
+            "family_id": family_id or str(uuid.uuid4()),
+            "created_at": now,
+            "expires_at": now + timedelta(days=REFRESH_TOKEN_EXPIRES_DAYS),
+            "revoked_at": None,
+        }
+    )
+    return token
+
+
+async def rotate_refresh_token(token: str) -> tuple[str, str]:
+    """Spend a refresh token and return (user_id, replacement token).
+
+    Presenting an already-spent token means it leaked, so the whole family is revoked.
+    """
+    collection = get_refresh_tokens_collection()
+    now = datetime.utcnow()
+    doc = await collection.find_one_and_update(
+        {"_id": token_key(token), "revoked_at": None, "expires_at": {"$gt": now}},
+        {"$set": {"revoked_at": now}},
+    )
+    if doc is None:
+        spent = await collection.find_one({"_id": token_key(token)}, projection={"family_id": 1, "revoked_at": 1})
+        if spent and spent.get("revoked_at"):
+            await revoke_refresh_family(spent["family_id"])
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    return doc["user_id"], await create_refresh_token(doc["user_id"], doc["family_id"])
+
+
+async def revoke_refresh_family(family_id: str):
+    await get_refresh_tokens_collection().update_many(
+        {"family_id": family_id, "revoked_at": None}, {"$set": {"revoked_at": datetime.utcnow()}}
+    )
+
+
+async def revoke_refresh_token(token: str):
+    """Logout: end the session this token belongs to. Unknown tokens are ignored."""
+    doc = await get_refresh_tokens_collection().find_one({"_id": token_key(token)}, projection={"family_id": 1})
+    if doc:
+        await revoke_refresh_family(doc["family_id"])
+
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user_id: str | None = payload.get("sub")
-        email: str | None = payload.get("email")
-        if user_id is None or email is None:
+    key = token_key(token)
+    claims = token_cache.get(key)
+    if claims is None:
+        try:
+            payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+            user_id: str | None = payload.get("sub")
+            email: str | None = payload.get("email")
+            if user_id is None or email is None:
+                raise credentials_exception
+        except JWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+        claims = (user_id, email)
+        exp = payload.get("exp")
+        token_cache.set(key, claims, exp - time.time() if exp is not None else None)
+    user_id, email = claims
 
-    user_collection = get_user_collection()
-    user = await user_collection.find_one({"_id": user_id})
-    if not user:
-        raise credentials_exception
+    user = user_cache.get(user_id)
+    if user is None:
+        user_collection = get_user_collection()
+        user = await user_collection.find_one({"_id": user_id}, projection={"password": 0})
+        if not user:
+            raise credentials_exception
+        user_cache.set(user_id, user)
     return {
         "id": user_id,
         "email": email,
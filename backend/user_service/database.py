@@ -1,22 +1,28 @@
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
+from mongo import get_client
+from pymongo import ASCENDING, IndexModel
 
 load_dotenv()
 
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 DB_NAME = os.getenv("USER_DB_NAME", "smart_shopping_user")
 
-_client: AsyncIOMotorClient | None = None
-
-def get_client() -> AsyncIOMotorClient:
-    global _client
-    if _client is None:
-        _client = AsyncIOMotorClient(MONGO_URI)
-    return _client
+# Indexes this service relies on; ensured on startup and checked by `python indexes.py --check`.
+INDEXES = {
+    "users": [IndexModel([("email", ASCENDING)], background=True)],
+    # _id is the token's SHA-256, so the exchange itself is an _id lookup.
+    "refresh_tokens": [
+        IndexModel([("family_id", ASCENDING)], background=True),
+        IndexModel([("user_id", ASCENDING)], background=True),
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, background=True),
+    ],
+}
 
 def get_database():
     return get_client()[DB_NAME]
 
 def get_user_collection():
     return get_database()["users"]
+
+def get_refresh_tokens_collection():
+    return get_database()["refresh_tokens"]
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import time
 import uuid
@@ -8,10 +9,32 @@ from fastapi import Depends, FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
 
-from auth import create_access_token, get_current_user, get_password_hash, verify_password
+from auth import (
+    auth_cache_stats,
+    check_password,
+    create_access_token,
+    create_refresh_token,
+    get_current_user,
+    hash_password,
+    password_pool,
+    revoke_refresh_token,
+    rotate_refresh_token,
+    user_cache,
+)
 from database import get_user_collection
+from indexes import provision_indexes
+from mongo import close_client, pool_stats, warm_up
 from metrics import send_metric
-from schemas import TokenResponse, UserCreate, UserLogin, UserOut
+from schemas import (
+    RefreshRequest,
+    TokenResponse,
+    UserBatchGetRequest,
+    UserBatchGetResponse,
+    UserCreate,
+    UserLogin,
+    UserOut,
+    UserPublic,
+)
 
 load_dotenv()
 
@@ -42,6 +65,27 @@ async def record_metrics(request: Request, call_next):
     return response
 
 
+@app.on_event("startup")
+async def start_index_provisioning():
+    # Runs in the background so a slow index build or unreachable Mongo doesn't block startup.
+    app.state.index_task = asyncio.create_task(provision_indexes(SERVICE_NAME))
+
+
+@app.on_event("startup")
+async def start_mongo_pool():
+    app.state.mongo_warm_up_task = asyncio.create_task(warm_up(SERVICE_NAME))
+
+
+@app.on_event("shutdown")
+async def close_mongo_pool():
+    close_client()
+
+
+@app.on_event("shutdown")
+async def stop_password_pool():
+    password_pool.shutdown()
+
+
 async def get_user_by_email(email: str) -> Any | None:
     user_collection = get_user_collection()
     return await user_collection.find_one({"email": email})
@@ -52,6 +96,21 @@ async def health():
     return {"service": SERVICE_NAME, "status": "ok"}
 
 
+@app.get("/health/pool")
+async def health_pool():
+    return {"service": SERVICE_NAME, **pool_stats.snapshot()}
+
+
+@app.get("/health/auth-cache")
+async def health_auth_cache():
+    return {"service": SERVICE_NAME, **auth_cache_stats()}
+
+
+@app.get("/health/password-pool")
+async def health_password_pool():
+    return {"service": SERVICE_NAME, **password_pool.stats()}
+
+
 @app.post("/auth/register", response_model=UserOut, status_code=status.HTTP_201_CREATED)
 async def register(payload: UserCreate):
     user_collection = get_user_collection()
@@ -60,7 +119,7 @@ async def register(payload: UserCreate):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
     user_id = str(uuid.uuid4())
-    hashed_pw = get_password_hash(payload.password)
+    hashed_pw = await hash_password(payload.password)
     user_doc = {
         "_id": user_id,
         "email": payload.email,
@@ -75,11 +134,27 @@ async def register(payload: UserCreate):
 @app.post("/auth/login", response_model=TokenResponse)
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     user = await get_user_by_email(form_data.username)
-    if not user or not verify_password(form_data.password, user.get("password")):
+    if not user or not await check_password(form_data.password, user.get("password")):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
     token = create_access_token({"sub": user.get("_id"), "email": user.get("email")})
-    return TokenResponse(access_token=token)
+    refresh_token = await create_refresh_token(user.get("_id"))
+    return TokenResponse(access_token=token, refresh_token=refresh_token)
+
+
+@app.post("/auth/refresh", response_model=TokenResponse)
+async def refresh(payload: RefreshRequest):
+    user_id, refresh_token = await rotate_refresh_token(payload.refresh_token)
+    user = await get_user_collection().find_one({"_id": user_id}, projection={"email": 1})
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    token = create_access_token({"sub": user_id, "email": user.get("email")})
+    return TokenResponse(access_token=token, refresh_token=refresh_token)
+
+
+@app.post("/auth/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(payload: RefreshRequest):
+    await revoke_refresh_token(payload.refresh_token)
 
 
 @app.get("/users/me", response_model=UserOut)
@@ -92,6 +167,42 @@ async def get_me(current_user=Depends(get_current_user)):
     )
 
 
+def serialize_user(doc) -> UserOut:
+    return UserOut(
+        id=doc["_id"],
+        email=doc.get("email"),
+        display_name=doc.get("display_name"),
+        admin=bool(doc.get("admin", False)),
+    )
+
+
+@app.post("/users/batch-get", response_model=UserBatchGetResponse)
+async def batch_get_users(payload: UserBatchGetRequest, current_user=Depends(get_current_user)):
+    """Resolve many user ids at once (e.g. collaborator names); results follow request order.
+
+    Open to any signed-in user, so only public profile fields are returned.
+    """
+    found = {}
+    uncached = []
+    for user_id in dict.fromkeys(payload.ids):
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            found[user_id] = cached
+        else:
+            uncached.append(user_id)
+    if uncached:
+        user_collection = get_user_collection()
+        async for doc in user_collection.find({"_id": {"$in": uncached}}, projection={"password": 0}):
+            found[doc["_id"]] = doc
+            user_cache.set(doc["_id"], doc)
+    users = [
+        UserPublic(id=user_id, display_name=found[user_id].get("display_name")) if user_id in found else None
+        for user_id in payload.ids
+    ]
+    missing = [user_id for user_id in dict.fromkeys(payload.ids) if user_id not in found]
+    return UserBatchGetResponse(users=users, missing=missing)
+
+
 # Developer note: Auth tokens are expected via Authorization: Bearer <token> header.
 # JWT secret/algorithm can be configured via env vars: JWT_SECRET, JWT_ALGORITHM, JWT_EXPIRES_MIN.
 # This service connects to MongoDB using MONGO_URI/DB_NAME env vars.
@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from pydantic import BaseModel, EmailStr, Field
 
 
@@ -19,6 +21,27 @@ class UserOut(BaseModel):
     admin: bool = False
 
 
+class UserPublic(BaseModel):
+    """What any signed-in user may see of another: no email or admin flag."""
+
+    id: str
+    display_name: str
+
+
+class UserBatchGetRequest(BaseModel):
+    ids: List[str] = Field(min_length=1, max_length=500)
+
+
+class UserBatchGetResponse(BaseModel):
+    users: List[Optional[UserPublic]]
+    missing: List[str] = []
+
+
 class TokenResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
@@ -42,6 +42,7 @@ export default function App() {
   const handleLogin = async (email, password) => {
     const res = await api.login(email, password)
     localStorage.setItem('token', res.access_token)
+    localStorage.setItem('refreshToken', res.refresh_token)
     setToken(res.access_token)
     const profile = await api.me(res.access_token)
     localStorage.setItem('user', JSON.stringify(profile))
@@ -51,15 +52,24 @@ export default function App() {
   }
 
   const handleLogout = () => {
+    const refreshToken = localStorage.getItem('refreshToken')
+    if (refreshToken) {
+      api.logout(refreshToken).catch(() => {})
+    }
     setToken('')
     setUser(null)
     setLoadingUser(false)
     localStorage.removeItem('token')
+    localStorage.removeItem('refreshToken')
     localStorage.removeItem('user')
     navigate('/login')
   }
 
   useEffect(() => {
+    // api renews an expired access token with the stored refresh token and retries the call;
+    // components get the new token through state, and a refused refresh ends the session.
+    api.setSessionHandlers({ onRefresh: setToken, onExpired: handleLogout })
+
     const stored = localStorage.getItem('token')
     if (!stored) {
       setLoadingUser(false)
@@ -68,8 +78,8 @@ export default function App() {
 
     const fetchProfile = async () => {
       try {
-        setToken(stored)
         const profile = await api.me(stored)
+        setToken(localStorage.getItem('token'))
         setUser(profile)
         localStorage.setItem('user', JSON.stringify(profile))
       } catch {
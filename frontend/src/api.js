@@ -4,8 +4,49 @@ const inventoryBase = import.meta.env.VITE_INVENTORY_SERVICE_URL || 'http://loca
 const statsBase = import.meta.env.VITE_STATS_SERVICE_URL || 'http://localhost:8004'
 const recommenderBase = import.meta.env.VITE_RECOMMENDER_SERVICE_URL || 'http://localhost:8005'
 
+// Told about rotated tokens and expired sessions; set by App via api.setSessionHandlers.
+let sessionHandlers = { onRefresh: () => {}, onExpired: () => {} }
+let pendingRefresh = null
+
+// Refresh tokens are single use (replaying one revokes the session), so concurrent 401s share one call.
+function refreshSession() {
+  if (!pendingRefresh) {
+    pendingRefresh = (async () => {
+      const refreshToken = localStorage.getItem('refreshToken')
+      if (!refreshToken) {
+        sessionHandlers.onExpired()
+        throw new Error('No refresh token')
+      }
+      const res = await fetch(`${userBase}/auth/refresh`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ refresh_token: refreshToken }),
+      })
+      if (!res.ok) {
+        if (res.status === 401) {
+          sessionHandlers.onExpired()
+        }
+        throw new Error((await res.text()) || 'Session expired')
+      }
+      const tokens = await res.json()
+      localStorage.setItem('token', tokens.access_token)
+      localStorage.setItem('refreshToken', tokens.refresh_token)
+      sessionHandlers.onRefresh(tokens.access_token)
+      return tokens.access_token
+    })().finally(() => {
+      pendingRefresh = null
+    })
+  }
+  return pendingRefresh
+}
+
 async function request(url, options = {}) {
-  const res = await fetch(url, options)
+  let res = await fetch(url, options)
+  // An access token that expired mid-session is renewed once and the call retried with it.
+  if (res.status === 401 && options.headers?.Authorization) {
+    const token = await refreshSession()
+    res = await fetch(url, { ...options, headers: { ...options.headers, Authorization: `Bearer ${token}` } })
+  }
   if (!res.ok) {
     const text = await res.text()
     throw new Error(text || 'Request failed')
@@ -14,6 +55,10 @@ async function request(url, options = {}) {
 }
 
 export const api = {
+  setSessionHandlers(handlers) {
+    sessionHandlers = { ...sessionHandlers, ...handlers }
+  },
+  refreshSession,
   async register(body) {
     return request(`${userBase}/auth/register`, {
       method: 'POST',
@@ -31,6 +76,16 @@ export const api = {
       body: form,
     })
   },
+  async logout(refreshToken) {
+    const res = await fetch(`${userBase}/auth/logout`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ refresh_token: refreshToken }),
+    })
+    if (!res.ok) {
+      throw new Error((await res.text()) || 'Request failed')
+    }
+  },
   async me(token) {
     return request(`${userBase}/users/me`, {
       headers: { Authorization: `Bearer ${token}` },
@@ -93,7 +148,8 @@ export const api = {
     } catch (err) {
       // Fallback to basic search if suggest route unavailable
       const url = query ? `${inventoryBase}/items?text=${encodeURIComponent(query)}&limit=100` : `${inventoryBase}/items`
-      return request(url)
+      const res = await request(url)
+      return Array.isArray(res) ? res : res.items
     }
   },
   async createItem(body) {